@@ -11,6 +11,9 @@
  * Serial commands from Python:
  * - "LED:note,r,g,b\n" - Set LED for specific note (0-87)
  * - "OFF:note\n" - Turn off LED for specific note
+ * - "BATCH:note,r,g,b;note,r,g,b\n" - Set several notes, one FastLED.show()
+ * - "PIXELS:index,r,g,b;index,r,g,b\n" - Set raw strip LEDs (0 to NUM_LEDS-1),
+ *   used by the LED Teacher wizard where one key spans several LEDs
  * - "CLEAR\n" - Turn off all LEDs
  * - "BRIGHTNESS:value\n" - Set brightness (0-255)
  */
@@ -19,7 +22,7 @@
 
 // LED Strip Configuration
 #define LED_PIN     6        // Data pin connected to WS2812B
-#define NUM_LEDS    88       // 88 piano keys (21-108 MIDI)
+#define NUM_LEDS    88       // 88 piano keys (21-108 MIDI); set to the physical strip length for PIXELS
 #define LED_TYPE    WS2812B
 #define COLOR_ORDER GRB
 #define BRIGHTNESS  128      // Default brightness (0-255)
@@ -123,33 +126,13 @@ void processCommand(String cmd) {
     // Format: BATCH:note1,r,g,b;note2,r,g,b;note3,r,g,b
     // Update multiple LEDs in one command for maximum speed
     cmd.remove(0, 6); // Remove "BATCH:"
-    
-    int startIdx = 0;
-    while (startIdx < cmd.length()) {
-      int semicolon = cmd.indexOf(';', startIdx);
-      if (semicolon == -1) semicolon = cmd.length();
-      
-      String ledCmd = cmd.substring(startIdx, semicolon);
-      
-      int c1 = ledCmd.indexOf(',');
-      int c2 = ledCmd.indexOf(',', c1 + 1);
-      int c3 = ledCmd.indexOf(',', c2 + 1);
-      
-      if (c1 > 0 && c2 > 0 && c3 > 0) {
-        int note = ledCmd.substring(0, c1).toInt();
-        int r = ledCmd.substring(c1 + 1, c2).toInt();
-        int g = ledCmd.substring(c2 + 1, c3).toInt();
-        int b = ledCmd.substring(c3 + 1).toInt();
-        
-        int ledIndex = note - 21;
-        if (ledIndex >= 0 && ledIndex < NUM_LEDS) {
-          leds[ledIndex] = CRGB(r, g, b);
-        }
-      }
-      
-      startIdx = semicolon + 1;
-    }
-    FastLED.show(); // Update all LEDs at once
+    applyLedList(cmd, 21); // MIDI note -> LED index
+  }
+  else if (cmd.startsWith("PIXELS:")) {
+    // Format: PIXELS:index1,r,g,b;index2,r,g,b
+    // Same as BATCH but with raw strip indices (several LEDs per key)
+    cmd.remove(0, 7); // Remove "PIXELS:"
+    applyLedList(cmd, 0);
   }
   else if (cmd.startsWith("OFF:")) {
     // Format: OFF:note
@@ -203,6 +186,35 @@ void setNoteLED(int midiNote, int r, int g, int b) {
   }
 }
 
+void applyLedList(String list, int indexOffset) {
+  // Parse "n,r,g,b;n,r,g,b" and set leds[n - indexOffset], then show once
+  int startIdx = 0;
+  while (startIdx < list.length()) {
+    int semicolon = list.indexOf(';', startIdx);
+    if (semicolon == -1) semicolon = list.length();
+    
+    String ledCmd = list.substring(startIdx, semicolon);
+    
+    int c1 = ledCmd.indexOf(',');
+    int c2 = ledCmd.indexOf(',', c1 + 1);
+    int c3 = ledCmd.indexOf(',', c2 + 1);
+    
+    if (c1 > 0 && c2 > 0 && c3 > 0) {
+      int ledIndex = ledCmd.substring(0, c1).toInt() - indexOffset;
+      int r = ledCmd.substring(c1 + 1, c2).toInt();
+      int g = ledCmd.substring(c2 + 1, c3).toInt();
+      int b = ledCmd.substring(c3 + 1).toInt();
+      
+      if (ledIndex >= 0 && ledIndex < NUM_LEDS) {
+        leds[ledIndex] = CRGB(r, g, b);
+      }
+    }
+    
+    startIdx = semicolon + 1;
+  }
+  FastLED.show(); // Update all LEDs at once
+}
+
 void clearAllLEDs() {
   fill_solid(leds, NUM_LEDS, CRGB::Black);
   FastLED.show();
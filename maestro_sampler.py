@@ -4,7 +4,7 @@ Usa los samples FLAC directamente (pygame soporta FLAC)
 """
 import pygame.mixer
 from pathlib import Path
-import threading
+import time
 
 
 class MaestroSampler:
@@ -15,7 +15,6 @@ class MaestroSampler:
         self.samples = {}  # {nota_midi: {velocity_layer: Sound}}
         self.active_sounds = {}  # {nota_midi: Sound actualmente sonando}
         self.active_channels = {}  # {nota_midi: Channel object}
-        import time
         self.note_start_times = {}  # {nota_midi: timestamp} para rastrear cuándo empezó cada nota
         
         # Mapeo de capas de velocidad (igual que convert_samples.py)
@@ -90,7 +89,8 @@ class MaestroSampler:
         Args:
             note (int): Número MIDI de la nota (21-108)
             velocity (int): Velocidad MIDI (0-127)
-            duration (float): Duración en segundos (None = hasta stop)
+            duration (float): Duración en segundos (None = hasta stop_note;
+                con duration solo stop_all la corta antes)
         """
         if note not in self.samples:
             print(f"⚠ No hay sample para nota {note}")
@@ -110,49 +110,53 @@ class MaestroSampler:
             print(f"⚠ No se encontró sample para nota {note}")
             return
         
+        # Limitar duración del sample a 4 segundos para liberar canales más rápido;
+        # con duration, el propio mixer de pygame corta antes (sin hilo por nota).
+        # maxtime=0 significa "sin límite" en pygame, así que el mínimo es 1 ms
+        maxtime = 4000
+        if duration is not None:
+            if duration <= 0:
+                return
+            maxtime = max(1, min(maxtime, int(duration * 1000)))
+        
         # Si la misma nota ya está sonando, detenerla primero
         if note in self.active_channels:
             try:
                 self.active_channels[note].stop()
             except:
                 pass
+            self.active_channels.pop(note, None)
+            self.active_sounds.pop(note, None)
+            self.note_start_times.pop(note, None)
+        
+        # Las notas con duration terminan solas en el mixer y no se registran:
+        # su canal quedaría en active_channels aunque pygame ya lo reutilizara
+        track = duration is None
         
         # Reproducir el sample
         try:
-            import time
-            # Limitar duración del sample a 4 segundos para liberar canales más rápido
-            channel = sound.play(maxtime=4000)  # Máximo 4 segundos
+            channel = sound.play(maxtime=maxtime)
             
-            if channel is not None:
+            if channel is not None and track:
                 self.active_sounds[note] = sound
                 self.active_channels[note] = channel
                 self.note_start_times[note] = time.time()
-            else:
+            elif channel is None:
                 # No hay canales disponibles - forzar liberación de notas viejas
                 self._cleanup_old_notes()
                 # Intentar de nuevo
-                channel = sound.play(maxtime=4000)
-                if channel is not None:
+                channel = sound.play(maxtime=maxtime)
+                if channel is not None and track:
                     self.active_sounds[note] = sound
                     self.active_channels[note] = channel
                     self.note_start_times[note] = time.time()
         except Exception as e:
             print(f"⚠ Error reproduciendo nota {note}: {e}")
-        
-        # Auto-detener después de duration (si se especifica)
-        if duration is not None:
-            def stop_after():
-                import time
-                time.sleep(duration)
-                self.stop_note(note)
-            
-            threading.Thread(target=stop_after, daemon=True).start()
     
     def _cleanup_old_notes(self, max_age=2.0):
         """
         Limpia notas que llevan sonando más de max_age segundos
         """
-        import time
         current_time = time.time()
         notes_to_remove = []
         
@@ -218,8 +222,6 @@ class MaestroSampler:
 
 # Test standalone
 if __name__ == "__main__":
-    import time
-    
     print("Inicializando pygame.mixer...")
     pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
     
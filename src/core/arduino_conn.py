@@ -2,6 +2,7 @@ from PyQt6.QtCore import QObject, pyqtSignal, QThread, QTimer
 import serial
 import time
 import random
+from collections import deque
 
 class ArduinoWorker(QObject):
     note_on = pyqtSignal(int, int) # note, velocity
@@ -15,6 +16,10 @@ class ArduinoWorker(QObject):
         self.mock = mock
         self.running = False
         self.serial = None
+        # (is_on, note, velocity) for the GUI thread to drain in batches; deque append and
+        # popleft are atomic, so no lock or cross-thread signal is needed per note.
+        # Unbounded on purpose: dropping an old note-off would leave a key stuck
+        self.note_events = deque()
 
     def run(self):
         self.running = True
@@ -36,14 +41,16 @@ class ArduinoWorker(QObject):
                 # (Notes will come from mouse/MIDI controller instead)
                 QThread.msleep(100)
             else:
-                if self.serial and self.serial.in_waiting:
-                    try:
-                        line = self.serial.readline().decode('utf-8', errors='ignore').strip()
-                        if line:
-                            self.parse_line(line)
-                    except Exception as e:
+                # Blocking readline wakes as soon as a full line arrives (the OS signals the
+                # port), and the 0.1s port timeout still lets the loop notice stop()
+                try:
+                    line = self.serial.readline().decode('utf-8', errors='ignore').strip()
+                    if line:
+                        self.parse_line(line)
+                except Exception as e:
+                    if self.running:
                         print(f"Serial read error: {e}")
-                QThread.msleep(10)
+                        QThread.msleep(10)
 
     def parse_line(self, line):
         # Expected Protocol examples: 
@@ -53,9 +60,13 @@ class ArduinoWorker(QObject):
             parts = line.split(':')
             cmd = parts[0].upper()
             if cmd == "ON" and len(parts) >= 3:
-                self.note_on.emit(int(parts[1]), int(parts[2]))
+                note, velocity = int(parts[1]), int(parts[2])
+                self.note_events.append((True, note, velocity))
+                self.note_on.emit(note, velocity)
             elif cmd == "OFF" and len(parts) >= 2:
-                self.note_off.emit(int(parts[1]))
+                note = int(parts[1])
+                self.note_events.append((False, note, 0))
+                self.note_off.emit(note)
         except ValueError:
             pass
 
@@ -1,6 +1,7 @@
 import mido
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer
 import time
+from bisect import bisect_right
 import numpy as np
 
 # Try to import audio libraries
@@ -41,6 +42,9 @@ class MidiEngine(QObject):
         super().__init__()
         self.synth = synth
         self.events = [] # List of {'time': float, 'msg': Message}
+        self.event_times = [] # Sorted event times, parallel to self.events (for seek)
+        self.midi_file = None # Parsed mido.MidiFile of the loaded song (shared with the staff)
+        self.total_time = 0.0 # Time of the last event (song duration), set by load_midi
         self.current_event_index = 0
         self.start_time = 0
         self.paused_at = 0
@@ -276,6 +280,7 @@ class MidiEngine(QObject):
     def load_midi(self, filename):
         try:
             mid = mido.MidiFile(filename)
+            self.midi_file = mid
             self.events = []
             current_time = 0
             for msg in mid:
@@ -297,6 +302,10 @@ class MidiEngine(QObject):
                 current_time -= first_note_time
                 print(f"MidiEngine: Removed {first_note_time:.2f}s of initial silence")
             
+            # MidiFile iteration is already time-ordered, so this list is sorted
+            self.event_times = [event['time'] for event in self.events]
+            self.total_time = self.event_times[-1] if self.event_times else 0.0
+            
             print(f"Loaded {len(self.events)} events. Total time: {current_time:.2f}s")
             
             # Load expected notes for evaluation
@@ -320,8 +329,10 @@ class MidiEngine(QObject):
         
         # Note: In Master mode, training_manager controls timing
         # In Practice/Student modes, this timing is used
-        # Start time at -preparation_time so clock reaches 0 when first note plays
-        self.start_time = time.time() - self.paused_at + self.preparation_time
+        # Start time at -preparation_time so clock reaches 0 when first note plays.
+        # start_time is on the monotonic perf_counter clock, so wall-clock adjustments
+        # (NTP, manual clock changes) can never make the playback position jump
+        self.start_time = time.perf_counter() - self.paused_at + self.preparation_time
         
         # Start recording for practice mode
         if self.mode == "Practice":
@@ -340,7 +351,7 @@ class MidiEngine(QObject):
         if not self.is_playing: return
         self.is_playing = False
         self.is_paused = True
-        self.paused_at = time.time() - self.start_time
+        self.paused_at = time.perf_counter() - self.start_time
         self.timer.stop()
         # Stop all sounds
         # self.synth.all_notes_off() # If implemented
@@ -355,30 +366,18 @@ class MidiEngine(QObject):
         self.playback_update.emit(-self.preparation_time)  # Emit negative time to show preparation phase
     
     def seek(self, position):
-        """Jump to specific position in seconds"""
+        """Jump to specific position in seconds (sounding voices are left to the caller)"""
         if not self.events:
             return
         
-        # Stop all currently playing notes
-        for note in range(128):
-            self.synth.note_off(note)
-            self.note_off_signal.emit(note)
-            if self.audio_type == 'pygame' and note in self.active_sounds:
-                self.active_sounds[note].stop()
-        
-        # Find the event index closest to the target position
-        target_index = 0
-        for i, event in enumerate(self.events):
-            if event['time'] <= position:
-                target_index = i
-            else:
-                break
+        # Find the last event at or before the target position (binary search)
+        target_index = max(bisect_right(self.event_times, position) - 1, 0)
         
         self.current_event_index = target_index
         
         # If playing, adjust start_time to continue from new position
         if self.is_playing:
-            self.start_time = time.time() - position + self.preparation_time
+            self.start_time = time.perf_counter() - position + self.preparation_time
         else:
             # If paused, update paused_at
             self.paused_at = position
@@ -401,7 +400,7 @@ class MidiEngine(QObject):
         if not self.is_playing: return
         
         # MASTER MODE or normal playback
-        now = time.time() - self.start_time
+        now = time.perf_counter() - self.start_time
         
         # Update visual position to current playback time
         self.playback_update.emit(now)
@@ -614,7 +613,7 @@ class MidiEngine(QObject):
                     print("Excellent! Student completed all 4 chords! Moving to next group...")
                     self.student_current_group += 1
                     self.student_is_teacher_turn = True
-                    self.start_time = time.time()  # Reset timer for next group
+                    self.start_time = time.perf_counter()  # Reset timer for next group
     
     def _handle_corrector_mode(self):
         """Corrector mode: Review and correct previous mistakes"""
@@ -626,7 +625,11 @@ class MidiEngine(QObject):
 
     def on_user_note_on(self, note, velocity):
         """Called when user presses a key"""
-        self.active_notes.add(note)
+        self.play_user_audio(note, velocity)
+        self.register_user_note_on(note, velocity)
+    
+    def play_user_audio(self, note, velocity):
+        """Sound a user key press. Touches no Qt objects, safe to call from the input thread"""
         self.synth.note_on(note, velocity)  # User feedback sound
         
         # Play audio for user input
@@ -634,6 +637,10 @@ class MidiEngine(QObject):
             self.audio_synth.noteon(0, note, velocity)
         elif self.audio_type in ['maestro', 'pygame']:
             self._play_note_pygame(note, velocity)
+    
+    def register_user_note_on(self, note, velocity):
+        """Update playback/mode state for a user key press (GUI thread)"""
+        self.active_notes.add(note)
         
         # PRACTICE MODE: Check if this is the note we're waiting for
         if self.mode == "Practice" and note in self.waiting_for:
@@ -642,7 +649,7 @@ class MidiEngine(QObject):
             # If all notes pressed, advance to next event
             if not self.waiting_for:
                 self.current_event_index += 1
-                self.start_time = time.time() - self.events[self.current_event_index]['time'] if self.current_event_index < len(self.events) else 0
+                self.start_time = time.perf_counter() - self.events[self.current_event_index]['time'] if self.current_event_index < len(self.events) else 0
         
         # STUDENT MODE: Track if student is playing correct notes
         if self.mode == "Student" and not self.student_is_teacher_turn:
@@ -658,8 +665,11 @@ class MidiEngine(QObject):
 
     def on_user_note_off(self, note):
         """Called when user releases a key"""
-        if note in self.active_notes:
-            self.active_notes.remove(note)
+        self.stop_user_audio(note)
+        self.register_user_note_off(note)
+    
+    def stop_user_audio(self, note):
+        """Silence a user key release. Touches no Qt objects, safe to call from the input thread"""
         self.synth.note_off(note)
         
         # Stop audio for user input
@@ -667,12 +677,10 @@ class MidiEngine(QObject):
             self.audio_synth.noteoff(0, note)
         elif self.audio_type in ['maestro', 'pygame']:
             self._stop_note_pygame(note)
-        
-        # Stop audio for user input
-        if self.audio_type == 'fluidsynth' and self.audio_synth:
-            self.audio_synth.noteoff(0, note)
-        elif self.audio_type == 'pygame':
-            self._stop_note_pygame(note)
+    
+    def register_user_note_off(self, note):
+        """Update playback state for a user key release (GUI thread)"""
+        self.active_notes.discard(note)
     
     def record_mistake(self, note, expected_note, time_occurred):
         """Record a mistake for Corrector mode"""
@@ -52,12 +52,13 @@ class PianoSynth:
     def all_notes_off(self):
         """Stop all currently playing notes"""
         if self.fs:
+            # One "All Notes Off" controller (CC 123) per channel instead of
+            # 128 individual note-offs per channel
             for channel in range(16):  # MIDI has 16 channels
-                for note in range(128):  # MIDI notes 0-127
-                    try:
-                        self.fs.noteoff(channel, note)
-                    except:
-                        pass
+                try:
+                    self.fs.cc(channel, 123, 0)
+                except:
+                    pass
     
     def cleanup(self):
         """Clean up resources before shutdown"""
@@ -105,8 +105,9 @@ class TimingSyncManager:
             return self.current_latency, {}
         
         # Extraer offsets de las últimas muestras
-        recent_samples = list(self.timing_samples)[-20:]  # Últimas 20
-        offsets = [s['offset'] for s in recent_samples]
+        # Últimas 20 sin copiar el deque completo
+        samples = self.timing_samples
+        offsets = [samples[i]['offset'] for i in range(max(len(samples) - 20, 0), len(samples))]
         
         # Calcular estadísticas
         mean_offset = statistics.mean(offsets)
@@ -5,6 +5,7 @@ Each mode controls how the staff, piano, and notes behave during playback
 
 from abc import ABCMeta, abstractmethod
 from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtGui import QColor
 import time
 import json
 import os
@@ -111,7 +112,7 @@ class PlayMode(TrainingMode):
         
         # Check if song finished (add 3 seconds delay to allow last note to fade)
         if self.midi_engine.events:
-            total_duration = max(evt['time'] for evt in self.midi_engine.events) if self.midi_engine.events else 0
+            total_duration = self.midi_engine.total_time  # Cached by load_midi
             if adjusted_time >= total_duration + 3.0:  # Add 3 second delay
                 self.is_active = False
                 self.mode_message.emit("✓ Song finished")
@@ -191,7 +192,7 @@ class MasterMode(TrainingMode):
         
         # Check if song finished - check against total song duration (add 3 seconds delay to allow last note to fade)
         if self.midi_engine.events:
-            total_duration = max(evt['time'] for evt in self.midi_engine.events) if self.midi_engine.events else 0
+            total_duration = self.midi_engine.total_time  # Cached by load_midi
             if adjusted_time >= total_duration + 3.0:  # Add 3 second delay
                 self.is_active = False
                 self.mode_message.emit("✓ Song finished")
@@ -617,7 +618,6 @@ class PracticeMode(TrainingMode):
                 # The tick() method will handle resuming from frozen_adjusted_time
         else:
             # Wrong note - highlight the wrong note AND all expected notes in red
-            from PyQt6.QtGui import QColor
             red_color = QColor(255, 0, 0)
             
             # Clear previous error highlights first
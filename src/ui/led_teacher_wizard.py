@@ -6,12 +6,128 @@ Handles automatic LED distribution and manual fine-tuning
 from PyQt6.QtWidgets import (QWizard, QWizardPage, QVBoxLayout, QHBoxLayout,
                               QLabel, QPushButton, QSpinBox, QComboBox, 
                               QRadioButton, QButtonGroup, QProgressBar,
-                              QGroupBox, QFormLayout, QTextEdit, QSlider,
+                              QGroupBox, QFormLayout, QPlainTextEdit, QSlider,
                               QCheckBox, QMessageBox)
 from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 from PyQt6.QtGui import QFont, QColor
 import json
+import os
+import numpy as np
+from dataclasses import dataclass, asdict
 from pathlib import Path
+from src.ui.piano_widget import NOTE_NAMES
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Strip length of the shipped Arduino sketch (NUM_LEDS in ws2812b_piano_leds.ino), used
+# when the "led_strip_leds" setting is not given
+DEFAULT_STRIP_LEDS = 88
+
+
+# Dark theme shared by every wizard instance (scoped to the wizard, not the app)
+_WIZARD_QSS = """
+    QWizard {
+        background-color: #2c3e50;
+    }
+    QWizardPage {
+        background-color: #34495e;
+        color: white;
+    }
+    QLabel {
+        color: white;
+    }
+    QPushButton {
+        background-color: #3498db;
+        color: white;
+        padding: 8px 16px;
+        border-radius: 4px;
+        font-weight: bold;
+    }
+    QPushButton:hover {
+        background-color: #2980b9;
+    }
+    QPushButton:disabled {
+        background-color: #7f8c8d;
+    }
+    QSpinBox, QComboBox {
+        background-color: #2c3e50;
+        color: white;
+        border: 1px solid #7f8c8d;
+        padding: 5px;
+        border-radius: 3px;
+    }
+    QRadioButton {
+        color: white;
+        spacing: 8px;
+    }
+    QRadioButton::indicator {
+        width: 18px;
+        height: 18px;
+    }
+    QGroupBox {
+        color: white;
+        border: 2px solid #3498db;
+        border-radius: 5px;
+        margin-top: 10px;
+        padding-top: 10px;
+        font-weight: bold;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 10px;
+        padding: 0 5px;
+    }
+    QProgressBar {
+        border: 2px solid #7f8c8d;
+        border-radius: 5px;
+        text-align: center;
+        background-color: #2c3e50;
+        color: white;
+    }
+    QProgressBar::chunk {
+        background-color: #27ae60;
+        border-radius: 3px;
+    }
+"""
+
+# Small per-widget styles, shared so identical snippets are one string
+_BODY_TEXT_QSS = "font-size: 12px; padding: 10px;"
+_INSTRUCTIONS_QSS = "padding: 10px; font-size: 13px;"
+_WARNING_QSS = "color: #f39c12; font-size: 12px;"
+_INFO_LABEL_QSS = "color: #3498db; font-style: italic; margin-top: 10px;"
+_HIGHLIGHT_LABEL_QSS = "color: #3498db; font-weight: bold;"
+# Starting key choices as (combo text, MIDI note)
+_START_KEYS = (
+    ("A0 (MIDI 21) - 88-key piano", 21),
+    ("C1 (MIDI 24)", 24),
+    ("C2 (MIDI 36) - 61-key keyboard", 36),
+    ("C3 (MIDI 48) - 49-key keyboard", 48),
+    ("C4 (MIDI 60) - 25-key keyboard", 60),
+)
+
+# Bit n is set when pitch class n is a black key (C#, D#, F#, G#, A#)
+_BLACK_MASK = 0b0101_0100_1010
+
+_MONO_TEXT_QSS = """
+    QPlainTextEdit {
+        background-color: #2c3e50;
+        color: #ecf0f1;
+        border: 1px solid #7f8c8d;
+        font-family: 'Courier New', monospace;
+        font-size: 10px;
+    }
+"""
+
+
+@dataclass(slots=True)
+class LedKey:
+    """LED range assigned to one piano key"""
+    start_led: int
+    num_leds: int
+    is_black: bool
 
 
 class LedTeacherWizard(QWizard):
@@ -29,13 +145,37 @@ class LedTeacherWizard(QWizard):
     # Signal emitted when calibration is complete
     calibration_complete = pyqtSignal(dict)  # Emits LED mapping configuration
     
-    def __init__(self, arduino_conn=None, parent=None):
+    # Fixed page ids, so pages can be created lazily in any order
+    (PAGE_WELCOME, PAGE_PIANO_CONFIG, PAGE_AUTO_DISTRIBUTION,
+     PAGE_VERIFICATION, PAGE_MANUAL_CALIBRATION, PAGE_FINAL) = range(6)
+    
+    # Pages reachable with Next from each page
+    _FOLLOWING_PAGES = {
+        PAGE_WELCOME: (PAGE_PIANO_CONFIG,),
+        PAGE_PIANO_CONFIG: (PAGE_AUTO_DISTRIBUTION,),
+        PAGE_AUTO_DISTRIBUTION: (PAGE_VERIFICATION,),
+        PAGE_VERIFICATION: (PAGE_MANUAL_CALIBRATION, PAGE_FINAL),
+        PAGE_MANUAL_CALIBRATION: (PAGE_FINAL,),
+        PAGE_FINAL: (),
+    }
+    
+    def __init__(self, arduino_conn=None, parent=None, strip_leds=DEFAULT_STRIP_LEDS):
         super().__init__(parent)
         
         self.arduino = arduino_conn
-        self.led_mapping = {}  # {midi_note: {'start_led': int, 'num_leds': int}}
+        self.strip_leds = strip_leds  # LEDs the firmware drives; higher indices can't be lit
+        self.led_mapping = {}  # {midi_note: LedKey}
+        self.led_keys = []  # Same LedKey objects in MIDI order, indexed by key position
         self.current_calibration_note = None
         
+        # LED updates are coalesced and sent as one BATCH command per flush
+        self._pending_leds = {}  # {led_index: (r, g, b)}
+        self._lit_leds = set()
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(10)
+        self._flush_timer.timeout.connect(self._flush_leds)
+        
         self.setWindowTitle("🎹 LED Teacher Setup Wizard")
         self.setWizardStyle(QWizard.WizardStyle.ModernStyle)
         self.setMinimumSize(700, 500)
@@ -44,79 +184,79 @@ class LedTeacherWizard(QWizard):
         # See setup_pages() method at the bottom
         
         # Apply dark theme
-        self.setStyleSheet("""
-            QWizard {
-                background-color: #2c3e50;
-            }
-            QWizardPage {
-                background-color: #34495e;
-                color: white;
-            }
-            QLabel {
-                color: white;
-            }
-            QPushButton {
-                background-color: #3498db;
-                color: white;
-                padding: 8px 16px;
-                border-radius: 4px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #2980b9;
-            }
-            QPushButton:disabled {
-                background-color: #7f8c8d;
-            }
-            QSpinBox, QComboBox {
-                background-color: #2c3e50;
-                color: white;
-                border: 1px solid #7f8c8d;
-                padding: 5px;
-                border-radius: 3px;
-            }
-            QRadioButton {
-                color: white;
-                spacing: 8px;
-            }
-            QRadioButton::indicator {
-                width: 18px;
-                height: 18px;
-            }
-            QGroupBox {
-                color: white;
-                border: 2px solid #3498db;
-                border-radius: 5px;
-                margin-top: 10px;
-                padding-top: 10px;
-                font-weight: bold;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                left: 10px;
-                padding: 0 5px;
-            }
-            QProgressBar {
-                border: 2px solid #7f8c8d;
-                border-radius: 5px;
-                text-align: center;
-                background-color: #2c3e50;
-                color: white;
-            }
-            QProgressBar::chunk {
-                background-color: #27ae60;
-                border-radius: 3px;
-            }
-        """)
+        self.setStyleSheet(_WIZARD_QSS)
     
     def setup_pages(self):
-        """Add pages after all classes are defined"""
-        self.addPage(WelcomePage(self))
-        self.addPage(PianoConfigPage(self))
-        self.addPage(AutoDistributionPage(self))
-        self.addPage(VerificationPage(self))
-        self.addPage(ManualCalibrationPage(self))
-        self.addPage(FinalPage(self))
+        """Add the first pages; the rest are built one step ahead as the user advances"""
+        self._page_classes = {
+            self.PAGE_WELCOME: WelcomePage,
+            self.PAGE_PIANO_CONFIG: PianoConfigPage,
+            self.PAGE_AUTO_DISTRIBUTION: AutoDistributionPage,
+            self.PAGE_VERIFICATION: VerificationPage,
+            self.PAGE_MANUAL_CALIBRATION: ManualCalibrationPage,
+            self.PAGE_FINAL: FinalPage,
+        }
+        self.setPage(self.PAGE_WELCOME, WelcomePage(self))
+        self.setStartId(self.PAGE_WELCOME)
+        self.currentIdChanged.connect(self._build_following_pages)
+        
+        # The next page must exist so the current one shows "Next" instead of "Finish"
+        self._build_following_pages(self.PAGE_WELCOME)
+    
+    def _build_following_pages(self, page_id):
+        """Create the pages reachable from page_id if they have not been built yet
+        
+        QWizard asks nextId() for the Next/Finish button before currentIdChanged
+        fires, so every non-final page returns its fixed PAGE_* id from nextId()
+        instead of relying on the following page already being registered.
+        """
+        for next_id in self._FOLLOWING_PAGES.get(page_id, ()):
+            if self.page(next_id) is None:
+                self.setPage(next_id, self._page_classes[next_id](self))
+    
+    def key_fits_strip(self, start_led, num_leds):
+        """True if every LED of the key is within the strip the firmware drives"""
+        return start_led + num_leds <= self.strip_leds
+    
+    def show_key_leds(self, start_led, num_leds, color=(0, 255, 0)):
+        """Light one key's LED range and turn off the previously lit one"""
+        for led in self._lit_leds:
+            self._pending_leds[led] = (0, 0, 0)
+        self._lit_leds = set(range(start_led, start_led + num_leds))
+        for led in self._lit_leds:
+            self._pending_leds[led] = color
+        self._flush_timer.start()
+    
+    def clear_leds(self):
+        """Drop pending updates and turn off the whole strip"""
+        self._flush_timer.stop()
+        self._pending_leds.clear()
+        self._lit_leds.clear()
+        self._send_arduino_command("CLEAR")
+    
+    def _flush_leds(self):
+        """Send all pending LED changes in a single BATCH command"""
+        if not self._pending_leds:
+            return
+        
+        # PIXELS takes raw strip indices; LEDs past the strip are left out (the pages
+        # tell the user when a key reaches beyond it, see key_fits_strip)
+        entries = [
+            f"{led},{r},{g},{b}" for led, (r, g, b) in self._pending_leds.items()
+            if 0 <= led < self.strip_leds
+        ]
+        self._pending_leds.clear()
+        if entries:
+            self._send_arduino_command("PIXELS:" + ";".join(entries))
+    
+    def _send_arduino_command(self, command):
+        """Write one newline-terminated command to the Arduino"""
+        if not self.arduino or not self.arduino.is_connected:
+            return
+        try:
+            self.arduino.write(f"{command}\n".encode())
+        except Exception as e:
+            print(f"⚠️ Error sending LED command: {e}")
     
     def get_led_mapping(self):
         """Get the final LED mapping configuration"""
@@ -160,7 +300,7 @@ class WelcomePage(QWizardPage):
             "The wizard will light up LEDs to help you verify the configuration."
         )
         warning_label.setWordWrap(True)
-        warning_label.setStyleSheet("color: #f39c12; font-size: 12px;")
+        warning_label.setStyleSheet(_WARNING_QSS)
         warning_layout.addWidget(warning_label)
         warning_box.setLayout(warning_layout)
         layout.addWidget(warning_box)
@@ -172,9 +312,28 @@ class WelcomePage(QWizardPage):
 class PianoConfigPage(QWizardPage):
     """Page 2: Piano configuration (keys, starting note)"""
     
+    # LED calculations (144 LEDs/meter = 6.94mm per LED), independent of user input
+    WHITE_KEY_WIDTH = 23.0  # mm (typical)
+    BLACK_KEY_WIDTH = 13.0  # mm (typical)
+    LED_SPACING = 6.94  # mm (144 LEDs/meter)
+    LEDS_PER_WHITE = round(WHITE_KEY_WIDTH / LED_SPACING)
+    LEDS_PER_BLACK = round(BLACK_KEY_WIDTH / LED_SPACING)
+    
+    ESTIMATE_TEMPLATE = (
+        "<b>Keys:</b> {white_keys} white + {black_keys} black = {num_keys} total<br><br>"
+        "<b>LEDs per key:</b><br>"
+        f"  • White keys: ~{LEDS_PER_WHITE} LEDs ({WHITE_KEY_WIDTH}mm ÷ {LED_SPACING}mm)<br>"
+        f"  • Black keys: ~{LEDS_PER_BLACK} LEDs ({BLACK_KEY_WIDTH}mm ÷ {LED_SPACING}mm)<br><br>"
+        "<b>Total LEDs needed:</b> ~{total_leds} LEDs<br>"
+        "<b>Strip length:</b> ~{total_length:.2f} meters<br>"
+        "<b>Firmware strip:</b> {strip_leds} LEDs (NUM_LEDS){strip_warning}<br><br>"
+        "<span style='color: #f39c12;'>⚠️ This is an estimate. We'll verify in the next steps.</span>"
+    )
+    
     def __init__(self, wizard):
         super().__init__()
         self.wizard = wizard
+        self._last_num_keys = None
         self.setTitle("🎹 Piano Configuration")
         self.setSubTitle("Tell us about your piano keyboard")
         
@@ -193,19 +352,13 @@ class PianoConfigPage(QWizardPage):
         
         # Starting key
         self.start_key_combo = QComboBox()
-        self.start_key_combo.addItems([
-            "A0 (MIDI 21) - 88-key piano",
-            "C1 (MIDI 24)",
-            "C2 (MIDI 36) - 61-key keyboard",
-            "C3 (MIDI 48) - 49-key keyboard",
-            "C4 (MIDI 60) - 25-key keyboard"
-        ])
-        self.start_key_combo.currentTextChanged.connect(self._update_estimate)
+        for text, midi in _START_KEYS:
+            self.start_key_combo.addItem(text, midi)
         form.addRow("Starting key:", self.start_key_combo)
         
         # LED strip specs
         info_label = QLabel("LED Strip: 144 LEDs/meter (6.94mm per LED)")
-        info_label.setStyleSheet("color: #3498db; font-style: italic; margin-top: 10px;")
+        info_label.setStyleSheet(_INFO_LABEL_QSS)
         form.addRow("", info_label)
         
         config_group.setLayout(form)
@@ -217,7 +370,7 @@ class PianoConfigPage(QWizardPage):
         
         self.estimate_label = QLabel()
         self.estimate_label.setWordWrap(True)
-        self.estimate_label.setStyleSheet("font-size: 12px; padding: 10px;")
+        self.estimate_label.setStyleSheet(_BODY_TEXT_QSS)
         estimate_layout.addWidget(self.estimate_label)
         
         estimate_group.setLayout(estimate_layout)
@@ -232,11 +385,18 @@ class PianoConfigPage(QWizardPage):
         # Register fields
         self.registerField("num_keys", self.keys_combo, "currentText")
         self.registerField("start_key", self.start_key_combo, "currentText")
+        self.registerField("start_key_midi", self.start_key_combo, "currentData",
+                           self.start_key_combo.currentIndexChanged)
     
     def _update_estimate(self):
         """Calculate and display LED estimates"""
         num_keys = int(self.keys_combo.currentText())
         
+        # The estimate only depends on the number of keys
+        if num_keys == self._last_num_keys:
+            return
+        self._last_num_keys = num_keys
+        
         # Calculate white and black keys
         # Piano pattern: C C# D D# E F F# G G# A A# B (7 white, 5 black per octave)
         full_octaves = num_keys // 12
@@ -246,45 +406,38 @@ class PianoConfigPage(QWizardPage):
         black_keys = full_octaves * 5
         
         # Count remaining keys
-        remaining_pattern = [True, False, True, False, True, True, False, True, False, True, False, True]  # White=True, Black=False
         for i in range(remaining_keys):
-            if remaining_pattern[i]:
-                white_keys += 1
-            else:
+            if (_BLACK_MASK >> i) & 1:
                 black_keys += 1
+            else:
+                white_keys += 1
         
-        # LED calculations (144 LEDs/meter = 6.94mm per LED)
-        white_key_width = 23.0  # mm (typical)
-        black_key_width = 13.0  # mm (typical)
-        led_spacing = 6.94  # mm (144 LEDs/meter)
-        
-        leds_per_white = round(white_key_width / led_spacing)
-        leds_per_black = round(black_key_width / led_spacing)
-        
-        total_leds = (white_keys * leds_per_white) + (black_keys * leds_per_black)
-        total_length = total_leds * led_spacing / 1000  # meters
+        total_leds = (white_keys * self.LEDS_PER_WHITE) + (black_keys * self.LEDS_PER_BLACK)
+        total_length = total_leds * self.LED_SPACING / 1000  # meters
         
         # Store for next page
         self.wizard.estimated_config = {
             'num_keys': num_keys,
             'white_keys': white_keys,
             'black_keys': black_keys,
-            'leds_per_white': leds_per_white,
-            'leds_per_black': leds_per_black,
+            'leds_per_white': self.LEDS_PER_WHITE,
+            'leds_per_black': self.LEDS_PER_BLACK,
             'total_leds': total_leds,
-            'total_length': total_length
+            'total_length': total_length,
+            'strip_leds': self.wizard.strip_leds,
+            'strip_warning': "" if total_leds <= self.wizard.strip_leds else (
+                "<br><span style='color: #e74c3c;'>⚠️ Keys past LED "
+                f"{self.wizard.strip_leds - 1} can't light up. Raise NUM_LEDS in the Arduino "
+                "sketch and \"Strip LEDs\" in the LedTeacher settings.</span>"
+            ),
         }
         
         # Display
-        self.estimate_label.setText(
-            f"<b>Keys:</b> {white_keys} white + {black_keys} black = {num_keys} total<br><br>"
-            f"<b>LEDs per key:</b><br>"
-            f"  • White keys: ~{leds_per_white} LEDs ({white_key_width}mm ÷ {led_spacing}mm)<br>"
-            f"  • Black keys: ~{leds_per_black} LEDs ({black_key_width}mm ÷ {led_spacing}mm)<br><br>"
-            f"<b>Total LEDs needed:</b> ~{total_leds} LEDs<br>"
-            f"<b>Strip length:</b> ~{total_length:.2f} meters<br><br>"
-            f"<span style='color: #f39c12;'>⚠️ This is an estimate. We'll verify in the next steps.</span>"
-        )
+        self.estimate_label.setText(self.ESTIMATE_TEMPLATE.format_map(self.wizard.estimated_config))
+    
+    def nextId(self):
+        """Fixed next page, so Next shows even before that page is built"""
+        return self.wizard.PAGE_AUTO_DISTRIBUTION
 
 
 class AutoDistributionPage(QWizardPage):
@@ -306,7 +459,7 @@ class AutoDistributionPage(QWizardPage):
             "• Black keys: ~13mm (≈2 LEDs at 144 LEDs/meter)"
         )
         info.setWordWrap(True)
-        info.setStyleSheet("padding: 10px; font-size: 12px;")
+        info.setStyleSheet(_BODY_TEXT_QSS)
         layout.addWidget(info)
         
         # Progress bar
@@ -318,18 +471,12 @@ class AutoDistributionPage(QWizardPage):
         results_group = QGroupBox("📋 LED Mapping")
         results_layout = QVBoxLayout()
         
-        self.results_text = QTextEdit()
+        self.results_text = QPlainTextEdit()
         self.results_text.setReadOnly(True)
+        self.results_text.setUndoRedoEnabled(False)
+        self.results_text.setMaximumBlockCount(200)
         self.results_text.setMaximumHeight(200)
-        self.results_text.setStyleSheet("""
-            QTextEdit {
-                background-color: #2c3e50;
-                color: #ecf0f1;
-                border: 1px solid #7f8c8d;
-                font-family: 'Courier New', monospace;
-                font-size: 10px;
-            }
-        """)
+        self.results_text.setStyleSheet(_MONO_TEXT_QSS)
         results_layout.addWidget(self.results_text)
         
         results_group.setLayout(results_layout)
@@ -354,66 +501,48 @@ class AutoDistributionPage(QWizardPage):
         leds_per_black = config['leds_per_black']
         
         # Get starting MIDI note
-        start_text = self.field("start_key")
-        if "21" in start_text:
-            start_midi = 21  # A0
-        elif "24" in start_text:
-            start_midi = 24  # C1
-        elif "36" in start_text:
-            start_midi = 36  # C2
-        elif "48" in start_text:
-            start_midi = 48  # C3
-        elif "60" in start_text:
-            start_midi = 60  # C4
-        else:
-            start_midi = 21  # Default A0
-        
-        # Calculate LED positions
-        self.wizard.led_mapping = {}
-        current_led = 0
+        start_midi = self.field("start_key_midi") or _START_KEYS[0][1]  # Default A0
         
+        # Calculate LED positions for the whole keyboard in one vectorized pass
         # Piano key pattern (relative to C): C=0, C#=1, D=2, D#=3, E=4, F=5, F#=6, G=7, G#=8, A=9, A#=10, B=11
-        # Black keys are: 1, 3, 6, 8, 10 (C#, D#, F#, G#, A#)
-        black_keys_in_octave = {1, 3, 6, 8, 10}
+        # Black keys are: 1, 3, 6, 8, 10 (C#, D#, F#, G#, A#), tested via _BLACK_MASK
+        notes = np.arange(start_midi, start_midi + num_keys)
+        is_black = ((_BLACK_MASK >> (notes % 12)) & 1).astype(bool)
+        num_leds = np.where(is_black, leds_per_black, leds_per_white)
+        end_led = np.cumsum(num_leds)
+        start_led = end_led - num_leds
+        
+        self.wizard.led_mapping = {
+            int(n): LedKey(int(s), int(l), bool(b))
+            for n, s, l, b in zip(notes, start_led, num_leds, is_black)
+        }
+        # The keys are a dense MIDI range, so calibration can index them by position
+        self.wizard.led_keys = list(self.wizard.led_mapping.values())
+        total_leds = int(end_led[-1]) if num_keys else 0
+        self.progress.setValue(100)
         
-        log_text = "LED Distribution:\n" + "="*50 + "\n"
+        lines = ["LED Distribution:", "="*50]
         
-        for i in range(num_keys):
-            midi_note = start_midi + i
-            note_in_octave = midi_note % 12
-            is_black = note_in_octave in black_keys_in_octave
-            
-            num_leds = leds_per_black if is_black else leds_per_white
-            
-            self.wizard.led_mapping[midi_note] = {
-                'start_led': current_led,
-                'num_leds': num_leds,
-                'is_black': is_black
-            }
+        for midi_note, mapping in self.wizard.led_mapping.items():
+            first_led = mapping.start_led
             
-            # Note name
-            note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-            octave = (midi_note // 12) - 1
-            note_name = f"{note_names[note_in_octave]}{octave}"
+            note_name = NOTE_NAMES[midi_note]
             
-            log_text += f"MIDI {midi_note:3d} ({note_name:4s}) {'⬛' if is_black else '⬜'}: LEDs {current_led:3d}-{current_led + num_leds - 1:3d} ({num_leds} LEDs)\n"
-            
-            current_led += num_leds
-            
-            # Update progress
-            progress = int((i + 1) / num_keys * 100)
-            self.progress.setValue(progress)
+            lines.append(f"MIDI {midi_note:3d} ({note_name:4s}) {'⬛' if mapping.is_black else '⬜'}: LEDs {first_led:3d}-{first_led + mapping.num_leds - 1:3d} ({mapping.num_leds} LEDs)")
         
-        total_leds = current_led
-        log_text += "="*50 + "\n"
-        log_text += f"Total LEDs required: {total_leds}\n"
+        lines.append("="*50)
+        lines.append(f"Total LEDs required: {total_leds}")
         
-        self.results_text.setText(log_text)
+        self.results_text.setPlainText("\n".join(lines))
         
         # Store total for reference
         self.wizard.total_leds_calculated = total_leds
         
         print(f"✅ LED distribution calculated: {num_keys} keys, {total_leds} LEDs")
+    
+    def nextId(self):
+        """Fixed next page, so Next shows even before that page is built"""
+        return self.wizard.PAGE_VERIFICATION
 
 
 class VerificationPage(QWizardPage):
@@ -433,7 +562,7 @@ class VerificationPage(QWizardPage):
             "Watch your piano keyboard and confirm if the LEDs line up correctly with each key."
         )
         instructions.setWordWrap(True)
-        instructions.setStyleSheet("padding: 10px; font-size: 13px;")
+        instructions.setStyleSheet(_INSTRUCTIONS_QSS)
         layout.addWidget(instructions)
         
         # Test controls
@@ -513,8 +642,13 @@ class VerificationPage(QWizardPage):
         midi_note = self.test_key_spin.value()
         if midi_note in self.wizard.led_mapping:
             mapping = self.wizard.led_mapping[midi_note]
-            print(f"💡 Lighting key {midi_note}: LEDs {mapping['start_led']}-{mapping['start_led'] + mapping['num_leds'] - 1}")
-            # TODO: Send command to Arduino to light up these LEDs
+            print(f"💡 Lighting key {midi_note}: LEDs {mapping.start_led}-{mapping.start_led + mapping.num_leds - 1}")
+            self.wizard.show_key_leds(mapping.start_led, mapping.num_leds)
+            if not self.wizard.key_fits_strip(mapping.start_led, mapping.num_leds):
+                QMessageBox.warning(self, "Beyond LED Strip",
+                                  f"MIDI note {midi_note} uses LEDs up to "
+                                  f"{mapping.start_led + mapping.num_leds - 1}, but the firmware "
+                                  f"only drives {self.wizard.strip_leds} LEDs.")
         else:
             QMessageBox.warning(self, "Key Not Found",
                               f"MIDI note {midi_note} is not in the current mapping.")
@@ -525,16 +659,16 @@ class VerificationPage(QWizardPage):
             return
         
         print("⚫ Clearing all LEDs...")
-        # TODO: Send command to Arduino to clear all LEDs
+        self.wizard.clear_leds()
     
     def nextId(self):
         """Determine next page based on alignment answer"""
         if self.no_radio.isChecked():
             # Go to manual calibration
-            return self.wizard.pageIds()[4]  # ManualCalibrationPage
+            return self.wizard.PAGE_MANUAL_CALIBRATION
         else:
             # Skip manual calibration, go to final page
-            return self.wizard.pageIds()[5]  # FinalPage
+            return self.wizard.PAGE_FINAL
 
 
 class ManualCalibrationPage(QWizardPage):
@@ -549,6 +683,12 @@ class ManualCalibrationPage(QWizardPage):
         self.current_key_index = 0
         self.keys_to_calibrate = []
         
+        # Coalesce rapid spin box changes into a single preview update
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(80)
+        self._preview_timer.timeout.connect(self._update_led_preview)
+        
         layout = QVBoxLayout()
         
         # Instructions
@@ -560,7 +700,7 @@ class ManualCalibrationPage(QWizardPage):
             "4. Click Next to move to the next key"
         )
         instructions.setWordWrap(True)
-        instructions.setStyleSheet("padding: 10px; font-size: 12px;")
+        instructions.setStyleSheet(_BODY_TEXT_QSS)
         layout.addWidget(instructions)
         
         # Current key info
@@ -584,11 +724,11 @@ class ManualCalibrationPage(QWizardPage):
         self.led_count_spin = QSpinBox()
         self.led_count_spin.setRange(1, 10)
         self.led_count_spin.setValue(3)
-        self.led_count_spin.valueChanged.connect(self._update_led_preview)
+        self.led_count_spin.valueChanged.connect(lambda: self._preview_timer.start())
         adjust_layout.addRow("Number of LEDs:", self.led_count_spin)
         
         self.led_range_label = QLabel("LED Range: -")
-        self.led_range_label.setStyleSheet("color: #3498db; font-weight: bold;")
+        self.led_range_label.setStyleSheet(_HIGHLIGHT_LABEL_QSS)
         adjust_layout.addRow("", self.led_range_label)
         
         adjust_group.setLayout(adjust_layout)
@@ -615,8 +755,8 @@ class ManualCalibrationPage(QWizardPage):
     
     def initializePage(self):
         """Initialize manual calibration"""
-        # Get all keys
-        self.keys_to_calibrate = sorted(self.wizard.led_mapping.keys())
+        # Get all keys (led_mapping is built in ascending MIDI order)
+        self.keys_to_calibrate = list(self.wizard.led_mapping)
         self.current_key_index = 0
         self.calibration_progress.setRange(0, len(self.keys_to_calibrate))
         self.calibration_progress.setValue(0)
@@ -629,20 +769,20 @@ class ManualCalibrationPage(QWizardPage):
             return
         
         midi_note = self.keys_to_calibrate[self.current_key_index]
-        mapping = self.wizard.led_mapping[midi_note]
+        mapping = self.wizard.led_keys[self.current_key_index]
         
-        # Note name
-        note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-        octave = (midi_note // 12) - 1
-        note_name = f"{note_names[midi_note % 12]}{octave}"
+        note_name = NOTE_NAMES[midi_note]
         
         self.current_key_label.setText(f"Key: {note_name} (MIDI {midi_note})")
         self.key_position_label.setText(
             f"Position: {self.current_key_index + 1} of {len(self.keys_to_calibrate)} | "
-            f"Type: {'Black ⬛' if mapping['is_black'] else 'White ⬜'}"
+            f"Type: {'Black ⬛' if mapping.is_black else 'White ⬜'}"
         )
         
-        self.led_count_spin.setValue(mapping['num_leds'])
+        # Set the spin box silently, the preview below updates and lights the key once
+        self.led_count_spin.blockSignals(True)
+        self.led_count_spin.setValue(mapping.num_leds)
+        self.led_count_spin.blockSignals(False)
         self._update_led_preview()
         
         # Update progress
@@ -651,40 +791,41 @@ class ManualCalibrationPage(QWizardPage):
         # Update button states
         self.prev_key_btn.setEnabled(self.current_key_index > 0)
         self.next_key_btn.setEnabled(self.current_key_index < len(self.keys_to_calibrate) - 1)
-        
-        # Light up current key
-        self._light_current_key()
     
     def _update_led_preview(self):
         """Update LED range display"""
         if not self.keys_to_calibrate:
             return
         
-        midi_note = self.keys_to_calibrate[self.current_key_index]
-        mapping = self.wizard.led_mapping[midi_note]
+        mapping = self.wizard.led_keys[self.current_key_index]
         new_count = self.led_count_spin.value()
         
-        start = mapping['start_led']
+        start = mapping.start_led
         end = start + new_count - 1
         
-        self.led_range_label.setText(f"LED Range: {start} to {end} ({new_count} LEDs)")
+        range_text = f"LED Range: {start} to {end} ({new_count} LEDs)"
+        if not self.wizard.key_fits_strip(start, new_count):
+            range_text += f"  ⚠️ past the {self.wizard.strip_leds}-LED strip"
+        self.led_range_label.setText(range_text)
         
         # Update mapping
-        self.wizard.led_mapping[midi_note]['num_leds'] = new_count
+        mapping.num_leds = new_count
         
         # Recalculate subsequent keys
-        self._recalculate_subsequent_leds()
+        self._recalculate_subsequent_leds(self.current_key_index)
         
         # Light up to show changes
         self._light_current_key()
     
-    def _recalculate_subsequent_leds(self):
-        """Recalculate LED positions for all keys after the current one"""
-        current_led = 0
-        for midi_note in sorted(self.wizard.led_mapping.keys()):
-            mapping = self.wizard.led_mapping[midi_note]
-            mapping['start_led'] = current_led
-            current_led += mapping['num_leds']
+    def _recalculate_subsequent_leds(self, start_index):
+        """Recalculate LED positions for the keys from start_index onwards"""
+        # Keys before start_index keep their positions, only the suffix shifts
+        led_keys = self.wizard.led_keys
+        current_led = led_keys[start_index].start_led
+        for i in range(start_index, len(led_keys)):
+            mapping = led_keys[i]
+            mapping.start_led = current_led
+            current_led += mapping.num_leds
     
     def _light_current_key(self):
         """Light up the current key's LEDs"""
@@ -692,22 +833,39 @@ class ManualCalibrationPage(QWizardPage):
             return
         
         midi_note = self.keys_to_calibrate[self.current_key_index]
-        mapping = self.wizard.led_mapping[midi_note]
+        mapping = self.wizard.led_keys[self.current_key_index]
         
-        print(f"💡 Lighting key {midi_note}: LEDs {mapping['start_led']}-{mapping['start_led'] + mapping['num_leds'] - 1}")
-        # TODO: Send command to Arduino
+        print(f"💡 Lighting key {midi_note}: LEDs {mapping.start_led}-{mapping.start_led + mapping.num_leds - 1}")
+        self.wizard.show_key_leds(mapping.start_led, mapping.num_leds)
+    
+    def _flush_pending_preview(self):
+        """Apply a debounced LED count change before leaving the current key"""
+        if self._preview_timer.isActive():
+            self._preview_timer.stop()
+            self._update_led_preview()
+    
+    def validatePage(self):
+        """Make sure the last adjustment is stored before moving on"""
+        self._flush_pending_preview()
+        return True
     
     def _previous_key(self):
         """Go to previous key"""
+        self._flush_pending_preview()
         if self.current_key_index > 0:
             self.current_key_index -= 1
             self._show_current_key()
     
     def _next_key(self):
         """Go to next key"""
+        self._flush_pending_preview()
         if self.current_key_index < len(self.keys_to_calibrate) - 1:
             self.current_key_index += 1
             self._show_current_key()
+    
+    def nextId(self):
+        """Fixed next page, so Next shows even before that page is built"""
+        return self.wizard.PAGE_FINAL
 
 
 class FinalPage(QWizardPage):
@@ -736,7 +894,7 @@ class FinalPage(QWizardPage):
         
         self.summary_label = QLabel()
         self.summary_label.setWordWrap(True)
-        self.summary_label.setStyleSheet("font-size: 12px; padding: 10px;")
+        self.summary_label.setStyleSheet(_BODY_TEXT_QSS)
         summary_layout.addWidget(self.summary_label)
         
         summary_group.setLayout(summary_layout)
@@ -763,11 +921,11 @@ class FinalPage(QWizardPage):
         """Show summary when page is displayed"""
         mapping = self.wizard.led_mapping
         num_keys = len(mapping)
-        total_leds = sum(m['num_leds'] for m in mapping.values())
+        total_leds = sum(m.num_leds for m in mapping.values())
         
         # Count by type
-        white_keys = sum(1 for m in mapping.values() if not m['is_black'])
-        black_keys = sum(1 for m in mapping.values() if m['is_black'])
+        white_keys = sum(1 for m in mapping.values() if not m.is_black)
+        black_keys = sum(1 for m in mapping.values() if m.is_black)
         
         self.summary_label.setText(
             f"<b>Piano Configuration:</b><br>"
@@ -792,27 +950,43 @@ class FinalPage(QWizardPage):
         
         # Save LED mapping
         mapping_file = config_dir / 'led_mapping.json'
-        with open(mapping_file, 'w', encoding='utf-8') as f:
-            json.dump(self.wizard.led_mapping, f, indent=2)
+        if orjson is not None:
+            payload = orjson.dumps(self.wizard.led_mapping, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            payload = json.dumps(self.wizard.led_mapping, separators=(',', ':'), default=asdict).encode('utf-8')
+        
+        # Skip the write when the saved mapping is already identical
+        try:
+            unchanged = mapping_file.read_bytes() == payload
+        except OSError:
+            unchanged = False
         
-        print(f"✅ LED mapping saved to {mapping_file}")
+        if unchanged:
+            print(f"✅ LED mapping unchanged, keeping {mapping_file}")
+        else:
+            # Write to a temp file and swap it in, so a crash never leaves a partial file
+            tmp_file = mapping_file.with_suffix('.json.tmp')
+            tmp_file.write_bytes(payload)
+            os.replace(tmp_file, mapping_file)
+            print(f"✅ LED mapping saved to {mapping_file}")
         
         # Emit signal with configuration
         self.wizard.calibration_complete.emit(self.wizard.led_mapping)
 
 
 # Helper function to create and initialize wizard
-def create_led_teacher_wizard(arduino_conn=None, parent=None):
+def create_led_teacher_wizard(arduino_conn=None, parent=None, strip_leds=DEFAULT_STRIP_LEDS):
     """
     Create and initialize LED Teacher Wizard
     
     Args:
         arduino_conn: Arduino connection object
         parent: Parent widget
+        strip_leds: LEDs driven by the firmware (NUM_LEDS in the Arduino sketch)
     
     Returns:
         Initialized LedTeacherWizard instance
     """
-    wizard = LedTeacherWizard(arduino_conn, parent)
+    wizard = LedTeacherWizard(arduino_conn, parent, strip_leds)
     wizard.setup_pages()
     return wizard
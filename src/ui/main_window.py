@@ -1,51 +1,347 @@
 import sys
 import os
 import json
+import queue
 import threading
 import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 import serial
 import serial.tools.list_ports
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QLabel, QComboBox, QFileDialog, QMessageBox, 
-                             QSpinBox, QDialog, QTextEdit)
-from PyQt6.QtCore import Qt, QThread, QSize, pyqtSignal, QObject, QTimer
+                             QSpinBox, QDialog, QTextEdit, QSlider, QListWidget)
+from PyQt6.QtCore import Qt, QThread, QSize, QPointF, pyqtSignal, pyqtSlot, QObject, QTimer
 
 from src.core.arduino_conn import ArduinoWorker
 from src.core.synth import PianoSynth
 from src.core.midi_engine import MidiEngine
+from src.core.training_mode_manager import TrainingModeManager
 from src.ui.score_view import SongLibrary
 from src.ui.staff_widget import StaffWidget
 from src.ui.settings_dialog import SettingsDialog
-from src.ui.piano_widget import PianoWidget
+from src.ui.piano_widget import PianoWidget, NoteSource
 from src.ui.song_list_widget import SongListWidget
 from src.ui.progress_bar import ProgressBar
-from PyQt6.QtGui import QColor
+from PyQt6.QtGui import QColor, QIcon, QImage, QPixmap, QPainter, QPainterPath, QPolygonF
+from PyQt6.QtSvg import QSvgRenderer
+
+# Diagnostics on UI-thread paths (song loading, slider drags, mode changes).
+# Debug records are dropped at the default WARNING level before any formatting.
+logger = logging.getLogger(__name__)
+
+# Repository root (src/ui/main_window.py -> ../..), resolved once at import so data
+# files are found regardless of the directory the app was launched from
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SETTINGS_PATH = os.path.join(PROJECT_ROOT, "settings.json")
+DEFAULT_SOUNDFONT_PATH = os.path.join(PROJECT_ROOT, "assets", "soundfonts", "default.sf2")
+
+# Built-in monochrome SVG icons, "currentColor" is replaced with the requested color
+_SVG_ICONS = {
+    "folder": '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="currentColor"><path d="M10 4H4c-1.1 0-2 .9-2 2v12c0 1.1.9 2 2 2h16c1.1 0 2-.9 2-2V8c0-1.1-.9-2-2-2h-8l-2-2z"/></svg>',
+    "play": '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="currentColor"><path d="M8 5v14l11-7z"/></svg>',
+    "pause": '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="currentColor"><path d="M6 4h4v16H6V4zm8 0h4v16h-4V4z"/></svg>',
+    "stop": '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="currentColor"><path d="M6 6h12v12H6z"/></svg>',
+    "music_note": '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="currentColor"><path d="M12 3v10.55c-.59-.34-1.27-.55-2-.55-2.21 0-4 1.79-4 4s1.79 4 4 4 4-1.79 4-4V7h4V3h-6z"/></svg>',
+    "settings": '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="currentColor"><path d="M19.14 12.94c.04-.3.06-.61.06-.94 0-.32-.02-.64-.07-.94l2.03-1.58c.18-.14.23-.41.12-.61l-1.92-3.32c-.12-.22-.37-.29-.59-.22l-2.39.96c-.5-.38-1.03-.7-1.62-.94l-.36-2.54c-.04-.24-.24-.41-.48-.41h-3.84c-.24 0-.43.17-.47.41l-.36 2.54c-.59.24-1.13.57-1.62.94l-2.39-.96c-.22-.08-.47 0-.59.22L2.74 8.87c-.12.21-.08.47.12.61l2.03 1.58c-.05.3-.09.63-.09.94s.02.64.07.94l-2.03 1.58c-.18.14-.23.41-.12.61l1.92 3.32c.12.22.37.29.59.22l2.39-.96c.5.38 1.03.7 1.62.94l.36 2.54c.05.24.24.41.48.41h3.84c.24 0 .44-.17.47-.41l.36-2.54c.59-.24 1.13-.56 1.62-.94l2.39.96c.22.08.47 0 .59-.22l1.92-3.32c.12-.22.07-.47-.12-.61l-2.01-1.58zM12 15.6c-1.98 0-3.6-1.62-3.6-3.6s1.62-3.6 3.6-3.6 3.6 1.62 3.6 3.6-1.62 3.6-3.6 3.6z"/></svg>',
+}
+
+# Straight-edged icons as polygons in the same 24x24 viewBox, painted directly
+# without building an SVG document (the curved icons still go through QSvgRenderer)
+_ICON_POLYGONS = {
+    "play": [[(8, 5), (8, 19), (19, 12)]],
+    "pause": [[(6, 4), (10, 4), (10, 20), (6, 20)], [(14, 4), (18, 4), (18, 20), (14, 20)]],
+    "stop": [[(6, 6), (18, 6), (18, 18), (6, 18)]],
+}
+
+# Toolbar button style template, color variants are derived once at import
+BTN_STYLE_DEFAULT = """
+    QPushButton {
+        background-color: #34495e;
+        border: none;
+        border-radius: 3px;
+        padding: 6px;
+        min-width: 27px;
+        min-height: 27px;
+    }
+    QPushButton:hover {
+        background-color: #4a5f7f;
+    }
+    QPushButton:pressed {
+        background-color: #2c3e50;
+    }
+    QPushButton:disabled {
+        background-color: #7f8c8d;
+    }
+"""
+
+COMBO_STYLE = """
+    QComboBox {
+        background-color: #34495e;
+        color: white;
+        border: none;
+        border-radius: 4px;
+        padding: 5px 10px;
+        min-width: 160px;
+    }
+    QComboBox:hover {
+        background-color: #4a5f7f;
+    }
+    QComboBox::drop-down {
+        border: none;
+    }
+    QComboBox QAbstractItemView {
+        background-color: #2c3e50;
+        color: white;
+        selection-background-color: #3498db;
+    }
+"""
+
+# Zoom (blue) and tempo (orange) slider/spinbox styles, tempo variants derived once at import
+ZOOM_SLIDER_STYLE = """
+    QSlider::groove:horizontal {
+        border: 1px solid #999999;
+        height: 4px;
+        background: #34495e;
+        margin: 2px 0;
+        border-radius: 2px;
+    }
+    QSlider::handle:horizontal {
+        background: #3498db;
+        border: 1px solid #2980b9;
+        width: 12px;
+        margin: -5px 0;
+        border-radius: 6px;
+    }
+    QSlider::handle:horizontal:hover {
+        background: #5dade2;
+    }
+"""
+TEMPO_SLIDER_STYLE = (ZOOM_SLIDER_STYLE.replace("#3498db", "#e67e22")
+                      .replace("#2980b9", "#d35400").replace("#5dade2", "#f39c12"))
+
+ZOOM_SPINBOX_STYLE = """
+    QSpinBox {
+        background-color: #34495e;
+        color: #ecf0f1;
+        border: 1px solid #2980b9;
+        border-radius: 3px;
+        padding: 2px;
+        font-size: 10px;
+    }
+    QSpinBox::up-button, QSpinBox::down-button {
+        background-color: #2980b9;
+        border: none;
+        width: 12px;
+    }
+    QSpinBox::up-button:hover, QSpinBox::down-button:hover {
+        background-color: #3498db;
+    }
+"""
+TEMPO_SPINBOX_STYLE = ZOOM_SPINBOX_STYLE.replace("#2980b9", "#d35400").replace("#3498db", "#e67e22")
+
+# Mode indicator label: idle look at startup, highlighted once a mode is picked
+MODE_LABEL_QSS_IDLE = "color: #ecf0f1; font-size: 11px; font-weight: bold;"
+MODE_LABEL_QSS_ACTIVE = ("color: #3498db; font-size: 12px; font-weight: bold; "
+                         "background-color: #34495e; padding: 5px 10px; border-radius: 3px;")
+
+# Training mode -> mode indicator text
+MODE_LABELS = {
+    "Play": "▶️ Play",
+    "Master": "🎹 Master",
+    "Student": "🎓 Student",
+    "Practice": "📝 Practice",
+    "Corrector": "✏️ Corrector",
+}
+
+# Training mode dialog entries: (mode, button text)
+TRAINING_MODE_BUTTONS = (
+    ("Play", "Reproducir\nSimplemente reproduce la canción"),
+    ("Master", "Maestro\nMuestra y toca automáticamente"),
+    ("Student", "Estudiante\nPrograma toca 4 acordes, tú los repites"),
+    ("Practice", "Práctica\nIlumina teclas, presiónalas para avanzar"),
+    ("Corrector", "Corrector\nCorrige errores anteriores"),
+)
+MODE_BUTTON_QSS = "QPushButton#modeButton { text-align: left; padding: 10px; }"
+
+# Sound name -> General MIDI program number
+SOUND_PROGRAMS = {
+    "Classic Piano": 0,
+    "Electric Piano": 4,
+    "Organ": 19,
+}
+
+# StaffWidget.clef_type for each clef selector entry, in combo order
+CLEF_TYPES = ("grand", "treble", "bass", "alto", "tenor", "soprano", "mezzosoprano", "baritone")
+
+# Toolbar icon buttons in layout order:
+# (attribute, objectName, icon, tooltip, slot method, spacing after)
+TOOLBAR_BUTTONS = (
+    ("btn_open", "openButton", "folder", "Open MIDI file", "open_midi", 5),
+    ("btn_play", "playButton", "play", "Play", "toggle_play", 0),
+    ("btn_pause", "pauseButton", "pause", "Pause", "pause_playback", 0),
+    ("btn_stop", "stopButton", "stop", "Stop", "stop_playback", 8),
+    ("btn_train", "trainButton", "music_note", "Training modes", "open_train_dialog", 8),
+)
+TOOLBAR_ICON_SIZE = QSize(18, 18)
+
+
+def _toolbar_button_qss(object_name, color):
+    """BTN_STYLE_DEFAULT scoped to one button objectName with its base color swapped"""
+    return BTN_STYLE_DEFAULT.replace("QPushButton", f"QPushButton#{object_name}").replace("#34495e", color)
+
+
+# Whole toolbar stylesheet, applied once to the controls bar instead of per widget.
+# The pause button switches to its "active" color through a dynamic property.
+TOOLBAR_QSS = "".join([
+    "* { background-color: #2c3e50; border-bottom: 2px solid #34495e; }\n",
+    _toolbar_button_qss("openButton", "#34495e"),
+    _toolbar_button_qss("settingsButton", "#34495e"),
+    _toolbar_button_qss("playButton", "#27ae60"),
+    _toolbar_button_qss("pauseButton", "#f39c12"),
+    _toolbar_button_qss("stopButton", "#c0392b"),
+    _toolbar_button_qss("trainButton", "#2980b9"),
+    'QPushButton#pauseButton[active="true"] { background-color: #e67e22; }\n',
+    COMBO_STYLE,
+])
+
+
+@lru_cache(maxsize=None)
+def _icon_path(name):
+    """Filled outline of a polygon icon in its 24x24 design space, built once per name"""
+    path = QPainterPath()
+    for points in _ICON_POLYGONS[name]:
+        path.addPolygon(QPolygonF([QPointF(x, y) for x, y in points]))
+        path.closeSubpath()
+    return path
+
+
+@lru_cache(maxsize=64)
+def create_svg_icon(name, color="#ffffff", size=24):
+    """Create QIcon from a built-in SVG icon (cached per name, color and size)"""
+    # Premultiplied ARGB is the raster engine's native blending format
+    image = QImage(size, size, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(image)
+    if name in _ICON_POLYGONS:
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.scale(size / 24, size / 24)
+        painter.fillPath(_icon_path(name), QColor(color))
+    else:
+        svg_bytes = _SVG_ICONS[name].replace("currentColor", color).encode()
+        QSvgRenderer(svg_bytes).render(painter)
+    painter.end()
+    return QIcon(QPixmap.fromImage(image))
+
+
+@lru_cache(maxsize=1)
+def _results_dialog_class():
+    """Import ResultsDialog on first use (only needed after a practice run)"""
+    from src.ui.results_dialog import ResultsDialog
+    return ResultsDialog
+
+
+# Queued Arduino note events per drain above which the GUI is falling behind the serial port
+ARDUINO_BACKLOG_WARN = 256
+
+# Minimum seconds between progress bar refreshes during playback (~30 Hz)
+PROGRESS_UPDATE_INTERVAL = 1 / 30
+
+# Seconds a MIDI port enumeration stays valid before the backend is queried again
+# (long enough for the startup scan to serve the selector; "Rescan" always re-queries)
+MIDI_INPUTS_TTL = 60.0
+_midi_inputs_cache = {"time": 0.0, "names": None}
+
+
+def get_midi_input_names(refresh=False):
+    """List MIDI input ports, memoized for MIDI_INPUTS_TTL seconds (refresh=True forces a rescan)"""
+    now = time.monotonic()
+    if (refresh or _midi_inputs_cache["names"] is None
+            or now - _midi_inputs_cache["time"] > MIDI_INPUTS_TTL):
+        import mido
+        _midi_inputs_cache["names"] = mido.get_input_names()
+        _midi_inputs_cache["time"] = now
+    return _midi_inputs_cache["names"]
+
+
+class MidiEnumWorker(QObject):
+    """Enumerates MIDI input ports on its own thread so the GUI never waits on the OS"""
+    devices_ready = pyqtSignal(list)  # port names
+    
+    def scan(self):
+        try:
+            names = get_midi_input_names(refresh=True)
+        except Exception as e:
+            print(f"MIDI device discovery failed: {e}")
+            return
+        self.devices_ready.emit(list(names))
+
 
 class MainWindow(QMainWindow):
+    midi_scan_requested = pyqtSignal()  # Ask MidiEnumWorker for a fresh port list
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("How To Piano")
         self.resize(1200, 900)
         
         # Settings file path
-        self.settings_file = os.path.join(os.getcwd(), "settings.json")
+        self.settings_file = SETTINGS_PATH
         
-        # Load settings or use defaults
+        # Load settings or use defaults. self.settings is the single source of truth for the
+        # session; rapid changes (zoom/tempo drags) are written out once after a short pause
         self.settings = self.load_settings()
+        self._settings_save_timer = QTimer(self)
+        self._settings_save_timer.setSingleShot(True)
+        self._settings_save_timer.setInterval(500)
+        self._settings_save_timer.timeout.connect(self.save_settings)
+        # One writer thread keeps file writes off the GUI thread and in order
+        self._settings_writer = ThreadPoolExecutor(max_workers=1)
+        
+        # Zoom/tempo slider drags are coalesced: only the latest value is applied, at most ~30 times/s
+        self._pending_zoom = None
+        self._zoom_timer = QTimer(self)
+        self._zoom_timer.setSingleShot(True)
+        self._zoom_timer.setInterval(33)
+        self._zoom_timer.timeout.connect(self._apply_zoom)
+        self._pending_tempo = None
+        self._tempo_timer = QTimer(self)
+        self._tempo_timer.setSingleShot(True)
+        self._tempo_timer.setInterval(33)
+        self._tempo_timer.timeout.connect(self._apply_tempo)
+        # Trigger state is reset once a zoom/tempo drag settles (80 ms without a change),
+        # not on every throttled step, so notes at the red line are not re-fired mid-drag
+        self._trigger_reset_timer = QTimer(self)
+        self._trigger_reset_timer.setSingleShot(True)
+        self._trigger_reset_timer.setInterval(80)
 
         # Initialize Core Components
         # Try to find a soundfont in assets
-        sf_path = os.path.join(os.getcwd(), "assets", "soundfonts", "default.sf2")
+        sf_path = DEFAULT_SOUNDFONT_PATH
         if not os.path.exists(sf_path):
             # Fallback or ask user? For now just warn
             print("No default soundfont found.")
         
-        self.synth = PianoSynth(sf_path)
-        self.midi_engine = MidiEngine(self.synth)
+        # Loading the SoundFont is mostly file I/O (samples are preloaded), so it runs on a
+        # worker thread while the playback engine initializes its own audio backend
+        # (Maestro samples / pygame) and the song library loads on this thread
+        with ThreadPoolExecutor(max_workers=1) as startup_pool:
+            synth_future = startup_pool.submit(PianoSynth, sf_path)
+            
+            # Initialize Song Library
+            self.song_library = SongLibrary()
+            
+            self.midi_engine = MidiEngine(None)
+            self.synth = synth_future.result()
+        self.midi_engine.synth = self.synth
         self.midi_engine.preparation_time = self.settings.get("preparation_time", 3)
         
-        # Initialize Song Library
-        self.song_library = SongLibrary()
+        # Note audio requested from the GUI thread is played in order by one persistent
+        # audio thread instead of a new thread per note. Items: (op, pitch, velocity)
+        self._audio_queue = queue.SimpleQueue()
+        self._audio_thread = threading.Thread(target=self._audio_worker, daemon=True)
+        self._audio_thread.start()
         
         # Training mode manager (will be initialized after widgets are created)
         self.training_manager = None
@@ -83,7 +379,7 @@ class MainWindow(QMainWindow):
         # Controls Area (Acciones - TOP section above staff)
         controls_widget = QWidget()
         controls_widget.setMaximumHeight(42)
-        controls_widget.setStyleSheet("background-color: #2c3e50; border-bottom: 2px solid #34495e;")
+        controls_widget.setStyleSheet(TOOLBAR_QSS)
         controls_layout = QHBoxLayout(controls_widget)
         controls_layout.setContentsMargins(8, 5, 8, 5)
         controls_layout.setSpacing(4)
@@ -93,6 +389,7 @@ class MainWindow(QMainWindow):
         self.score_view = StaffWidget()
         self.score_view.setMinimumHeight(400)
         right_layout.addWidget(self.score_view, stretch=10)
+        self._trigger_reset_timer.timeout.connect(self.score_view.reset_triggers)
         
         # Progress Bar (above piano)
         self.progress_bar = ProgressBar()
@@ -108,8 +405,10 @@ class MainWindow(QMainWindow):
         self.piano_widget.show_note_names = self.settings.get("show_key_labels", True)
         self.piano_widget.show_finger_colors = self.settings.get("show_finger_colors", True)
         
-        # Apply played note color to staff
-        self.score_view.played_note_color = self.get_played_note_color()
+        # Apply played note color to staff and piano
+        played_note_color = self.get_played_note_color()
+        self.score_view.played_note_color = played_note_color
+        self.piano_widget.set_source_color(NoteSource.PLAYBACK, played_note_color)
         self.piano_widget.show_finger_numbers = self.settings.get("show_finger_numbers", True)
         self.piano_widget.show_active_note_colors = self.settings.get("show_active_note_colors", True)
         
@@ -137,13 +436,25 @@ class MainWindow(QMainWindow):
         self.arduino.moveToThread(self.arduino_thread)
         self.arduino_thread.started.connect(self.arduino.run)
         
-        # Connect Arduino -> MidiEngine
-        self.arduino.note_on.connect(self.midi_engine.on_user_note_on)
-        self.arduino.note_off.connect(self.midi_engine.on_user_note_off)
+        # MIDI port discovery worker; results come back queued to _on_midi_inputs_ready
+        self.midi_enum = MidiEnumWorker()
+        self.midi_enum_thread = QThread()
+        self.midi_enum.moveToThread(self.midi_enum_thread)
+        self.midi_scan_requested.connect(self.midi_enum.scan)
+        self.midi_enum.devices_ready.connect(self._on_midi_inputs_ready,
+                                             Qt.ConnectionType.QueuedConnection)
+        self._cached_midi_inputs = None  # Last port list shown to the user
+        self._midi_selector_populate = None  # Refill callback of the open MIDI selector
         
-        # Connect Arduino -> PianoWidget (Visual Feedback with bright orange for user input)
-        self.arduino.note_on.connect(self.on_arduino_note_on)
-        self.arduino.note_off.connect(self.on_arduino_note_off)
+        # Connect Arduino -> MidiEngine
+        # Audio runs directly on the Arduino thread so it never waits behind a repaint.
+        # Engine state, visuals and the training manager are fed on the GUI thread from
+        # arduino.note_events by _drain_arduino_notes (started in _start_io)
+        self.arduino.note_on.connect(self.midi_engine.play_user_audio, Qt.ConnectionType.DirectConnection)
+        self.arduino.note_off.connect(self.midi_engine.stop_user_audio, Qt.ConnectionType.DirectConnection)
+        self._arduino_drain_timer = QTimer(self)
+        self._arduino_drain_timer.setInterval(16)
+        self._arduino_drain_timer.timeout.connect(self._drain_arduino_notes)
         
         # Connect PianoWidget Mouse -> MidiEngine (Interactive Piano)
         self.piano_widget.note_pressed.connect(self.midi_engine.on_user_note_on)
@@ -156,101 +467,14 @@ class MainWindow(QMainWindow):
         # Connect PianoWidget -> Arduino LED control
         self.piano_widget.note_pressed.connect(self.send_arduino_led_on)
         self.piano_widget.note_released.connect(self.send_arduino_led_off)
-        
-        self.arduino_thread.start()
 
-        # Control Buttons - SVG Icons
-        from PyQt6.QtSvg import QSvgRenderer
-        from PyQt6.QtGui import QIcon, QPixmap, QPainter as QP
-        
-        def create_svg_icon(svg_data, color="#ffffff"):
-            """Create QIcon from SVG data"""
-            svg_bytes = svg_data.replace("currentColor", color).encode()
-            renderer = QSvgRenderer(svg_bytes)
-            pixmap = QPixmap(24, 24)
-            pixmap.fill(Qt.GlobalColor.transparent)
-            painter = QP(pixmap)
-            renderer.render(painter)
-            painter.end()
-            return QIcon(pixmap)
-        
-        # SVG icon definitions
-        svg_folder = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="currentColor"><path d="M10 4H4c-1.1 0-2 .9-2 2v12c0 1.1.9 2 2 2h16c1.1 0 2-.9 2-2V8c0-1.1-.9-2-2-2h-8l-2-2z"/></svg>'
-        svg_play = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="currentColor"><path d="M8 5v14l11-7z"/></svg>'
-        svg_pause = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="currentColor"><path d="M6 4h4v16H6V4zm8 0h4v16h-4V4z"/></svg>'
-        svg_stop = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="currentColor"><path d="M6 6h12v12H6z"/></svg>'
-        svg_music_note = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="currentColor"><path d="M12 3v10.55c-.59-.34-1.27-.55-2-.55-2.21 0-4 1.79-4 4s1.79 4 4 4 4-1.79 4-4V7h4V3h-6z"/></svg>'
-        svg_settings = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="currentColor"><path d="M19.14 12.94c.04-.3.06-.61.06-.94 0-.32-.02-.64-.07-.94l2.03-1.58c.18-.14.23-.41.12-.61l-1.92-3.32c-.12-.22-.37-.29-.59-.22l-2.39.96c-.5-.38-1.03-.7-1.62-.94l-.36-2.54c-.04-.24-.24-.41-.48-.41h-3.84c-.24 0-.43.17-.47.41l-.36 2.54c-.59.24-1.13.57-1.62.94l-2.39-.96c-.22-.08-.47 0-.59.22L2.74 8.87c-.12.21-.08.47.12.61l2.03 1.58c-.05.3-.09.63-.09.94s.02.64.07.94l-2.03 1.58c-.18.14-.23.41-.12.61l1.92 3.32c.12.22.37.29.59.22l2.39-.96c.5.38 1.03.7 1.62.94l.36 2.54c.05.24.24.41.48.41h3.84c.24 0 .44-.17.47-.41l.36-2.54c.59-.24 1.13-.56 1.62-.94l2.39.96c.22.08.47 0 .59-.22l1.92-3.32c.12-.22.07-.47-.12-.61l-2.01-1.58zM12 15.6c-1.98 0-3.6-1.62-3.6-3.6s1.62-3.6 3.6-3.6 3.6 1.62 3.6 3.6-1.62 3.6-3.6 3.6z"/></svg>'
-        
-        btn_style = """
-            QPushButton {
-                background-color: #34495e;
-                border: none;
-                border-radius: 3px;
-                padding: 6px;
-                min-width: 27px;
-                min-height: 27px;
-            }
-            QPushButton:hover {
-                background-color: #4a5f7f;
-            }
-            QPushButton:pressed {
-                background-color: #2c3e50;
-            }
-            QPushButton:disabled {
-                background-color: #7f8c8d;
-            }
-        """
-        
-        # File control
-        self.btn_open = QPushButton()
-        self.btn_open.setIcon(create_svg_icon(svg_folder))
-        self.btn_open.setIconSize(QSize(18, 18))
-        self.btn_open.clicked.connect(self.open_midi)
-        self.btn_open.setStyleSheet(btn_style)
-        self.btn_open.setToolTip("Open MIDI file")
-        controls_layout.addWidget(self.btn_open)
-        
-        controls_layout.addSpacing(5)
-        
-        # Playback controls
-        self.btn_play = QPushButton()
-        self.btn_play.setIcon(create_svg_icon(svg_play))
-        self.btn_play.setIconSize(QSize(18, 18))
-        self.btn_play.clicked.connect(self.toggle_play)
-        self.btn_play.setStyleSheet(btn_style.replace("#34495e", "#27ae60"))
-        self.btn_play.setToolTip("Play")
-        controls_layout.addWidget(self.btn_play)
-        
-        self.btn_pause = QPushButton()
-        self.btn_pause.setIcon(create_svg_icon(svg_pause))
-        self.btn_pause.setIconSize(QSize(18, 18))
-        self.btn_pause.clicked.connect(self.pause_playback)
-        self.btn_pause.setStyleSheet(btn_style.replace("#34495e", "#f39c12"))
+        # Control Buttons - SVG Icons (file, playback and training controls)
+        for attr, object_name, icon, tooltip, slot, spacing in TOOLBAR_BUTTONS:
+            button = self._add_toolbar_button(controls_layout, object_name, icon, tooltip, getattr(self, slot))
+            setattr(self, attr, button)
+            if spacing:
+                controls_layout.addSpacing(spacing)
         self.btn_pause.setEnabled(False)
-        self.btn_pause.setToolTip("Pause")
-        controls_layout.addWidget(self.btn_pause)
-
-        self.btn_stop = QPushButton()
-        self.btn_stop.setIcon(create_svg_icon(svg_stop))
-        self.btn_stop.setIconSize(QSize(18, 18))
-        self.btn_stop.clicked.connect(self.stop_playback)
-        self.btn_stop.setStyleSheet(btn_style.replace("#34495e", "#c0392b"))
-        self.btn_stop.setToolTip("Stop")
-        controls_layout.addWidget(self.btn_stop)
-        
-        controls_layout.addSpacing(8)
-        
-        # Train button
-        self.btn_train = QPushButton()
-        self.btn_train.setIcon(create_svg_icon(svg_music_note))
-        self.btn_train.setIconSize(QSize(18, 18))
-        self.btn_train.clicked.connect(self.open_train_dialog)
-        self.btn_train.setStyleSheet(btn_style.replace("#34495e", "#2980b9"))
-        self.btn_train.setToolTip("Training modes")
-        controls_layout.addWidget(self.btn_train)
-        
-        controls_layout.addSpacing(8)
         
         # Clef selector
         self.clef_selector = QComboBox()
@@ -266,37 +490,11 @@ class MainWindow(QMainWindow):
         ])
         self.clef_selector.setCurrentIndex(0)  # Default to Grand Staff
         self.clef_selector.currentIndexChanged.connect(self.change_clef)
-        self.clef_selector.setStyleSheet("""
-            QComboBox {
-                background-color: #34495e;
-                color: white;
-                border: none;
-                border-radius: 4px;
-                padding: 5px 10px;
-                min-width: 160px;
-            }
-            QComboBox:hover {
-                background-color: #4a5f7f;
-            }
-            QComboBox::drop-down {
-                border: none;
-            }
-            QComboBox QAbstractItemView {
-                background-color: #2c3e50;
-                color: white;
-                selection-background-color: #3498db;
-            }
-        """)
         controls_layout.addWidget(self.clef_selector)
         
-        controls_layout.addSpacing(8)
-        
-        # Sound selector (compact)
-        
-        controls_layout.addSpacing(8)
+        controls_layout.addSpacing(16)
         
         # Zoom control (visual speed)
-        from PyQt6.QtWidgets import QSlider
         zoom_label = QLabel("Zoom:")
         zoom_label.setStyleSheet("color: #ecf0f1; font-size: 10px;")
         controls_layout.addWidget(zoom_label)
@@ -309,25 +507,7 @@ class MainWindow(QMainWindow):
         self.zoom_slider.setTickInterval(25)
         self.zoom_slider.setMaximumWidth(80)
         self.zoom_slider.valueChanged.connect(self.change_zoom)
-        self.zoom_slider.setStyleSheet("""
-            QSlider::groove:horizontal {
-                border: 1px solid #999999;
-                height: 4px;
-                background: #34495e;
-                margin: 2px 0;
-                border-radius: 2px;
-            }
-            QSlider::handle:horizontal {
-                background: #3498db;
-                border: 1px solid #2980b9;
-                width: 12px;
-                margin: -5px 0;
-                border-radius: 6px;
-            }
-            QSlider::handle:horizontal:hover {
-                background: #5dade2;
-            }
-        """)
+        self.zoom_slider.setStyleSheet(ZOOM_SLIDER_STYLE)
         controls_layout.addWidget(self.zoom_slider)
         
         self.zoom_spinbox = QSpinBox()
@@ -336,24 +516,7 @@ class MainWindow(QMainWindow):
         self.zoom_spinbox.setValue(self.settings.get('visual_zoom', 100))
         self.zoom_spinbox.setSuffix("%")
         self.zoom_spinbox.setMaximumWidth(60)
-        self.zoom_spinbox.setStyleSheet("""
-            QSpinBox {
-                background-color: #34495e;
-                color: #ecf0f1;
-                border: 1px solid #2980b9;
-                border-radius: 3px;
-                padding: 2px;
-                font-size: 10px;
-            }
-            QSpinBox::up-button, QSpinBox::down-button {
-                background-color: #2980b9;
-                border: none;
-                width: 12px;
-            }
-            QSpinBox::up-button:hover, QSpinBox::down-button:hover {
-                background-color: #3498db;
-            }
-        """)
+        self.zoom_spinbox.setStyleSheet(ZOOM_SPINBOX_STYLE)
         self.zoom_spinbox.valueChanged.connect(self.on_zoom_spinbox_changed)
         controls_layout.addWidget(self.zoom_spinbox)
         
@@ -372,25 +535,7 @@ class MainWindow(QMainWindow):
         self.tempo_slider.setTickInterval(25)
         self.tempo_slider.setMaximumWidth(80)
         self.tempo_slider.valueChanged.connect(self.change_tempo)
-        self.tempo_slider.setStyleSheet("""
-            QSlider::groove:horizontal {
-                border: 1px solid #999999;
-                height: 4px;
-                background: #34495e;
-                margin: 2px 0;
-                border-radius: 2px;
-            }
-            QSlider::handle:horizontal {
-                background: #e67e22;
-                border: 1px solid #d35400;
-                width: 12px;
-                margin: -5px 0;
-                border-radius: 6px;
-            }
-            QSlider::handle:horizontal:hover {
-                background: #f39c12;
-            }
-        """)
+        self.tempo_slider.setStyleSheet(TEMPO_SLIDER_STYLE)
         controls_layout.addWidget(self.tempo_slider)
         
         self.tempo_spinbox = QSpinBox()
@@ -399,24 +544,7 @@ class MainWindow(QMainWindow):
         self.tempo_spinbox.setValue(self.settings.get('playback_tempo', 100))
         self.tempo_spinbox.setSuffix("%")
         self.tempo_spinbox.setMaximumWidth(60)
-        self.tempo_spinbox.setStyleSheet("""
-            QSpinBox {
-                background-color: #34495e;
-                color: #ecf0f1;
-                border: 1px solid #d35400;
-                border-radius: 3px;
-                padding: 2px;
-                font-size: 10px;
-            }
-            QSpinBox::up-button, QSpinBox::down-button {
-                background-color: #d35400;
-                border: none;
-                width: 12px;
-            }
-            QSpinBox::up-button:hover, QSpinBox::down-button:hover {
-                background-color: #e67e22;
-            }
-        """)
+        self.tempo_spinbox.setStyleSheet(TEMPO_SPINBOX_STYLE)
         self.tempo_spinbox.valueChanged.connect(self.on_tempo_spinbox_changed)
         controls_layout.addWidget(self.tempo_spinbox)
         
@@ -424,19 +552,15 @@ class MainWindow(QMainWindow):
         
         # Current mode indicator (compact)
         self.mode_label = QLabel("▶️ Play")
-        self.mode_label.setStyleSheet("color: #ecf0f1; font-size: 11px; font-weight: bold;")
+        self.mode_label.setStyleSheet(MODE_LABEL_QSS_IDLE)
+        self._mode_label_qss = MODE_LABEL_QSS_IDLE
         controls_layout.addWidget(self.mode_label)
         
         controls_layout.addSpacing(10)
         
         # Settings button
-        self.btn_settings = QPushButton()
-        self.btn_settings.setIcon(create_svg_icon(svg_settings))
-        self.btn_settings.setIconSize(QSize(18, 18))
-        self.btn_settings.clicked.connect(self.open_settings)
-        self.btn_settings.setStyleSheet(btn_style)
-        self.btn_settings.setToolTip("Settings")
-        controls_layout.addWidget(self.btn_settings)
+        self.btn_settings = self._add_toolbar_button(controls_layout, "settingsButton", "settings",
+                                                     "Settings", self.open_settings)
         
         controls_layout.addSpacing(8)
         
@@ -487,13 +611,20 @@ class MainWindow(QMainWindow):
         self.arduino_serial = None
         self.arduino_console_dialog = None
         
+        # LED changes queued during one event-loop pass, sent as a single BATCH frame
+        self._pending_led_ops = {}  # {midi_note: brightness (0 = off)}
+        self._led_flush_scheduled = False
+        
         # MIDI connection state
         self.midi_connected = False
         self.midi_port = None
         self.midi_device_name = "Mock Mode"
         
-        # Add stretch to push controls to the left
-        controls_layout.addStretch()
+        # "Open MIDI" file dialog, created on first use and reused (keeps its directory)
+        self._midi_file_dialog = None
+        
+        # Training mode dialog, built on first use and reused
+        self._mode_dialog = None
         
         # Status Bar
         self.status_label = QLabel("Ready")
@@ -503,9 +634,23 @@ class MainWindow(QMainWindow):
         QTimer.singleShot(1000, self.detect_arduino_connection)
         
         # Connect Engine Signals
+        # The progress bar shows the latest playback time at most ~30 times/s; the timer
+        # always applies the newest value, so one-shot jumps (seek, stop, freeze) land too
+        self._pending_progress_time = None
+        self._progress_timer = QTimer(self)
+        self._progress_timer.setSingleShot(True)
+        self._progress_timer.setInterval(int(PROGRESS_UPDATE_INTERVAL * 1000))
+        self._progress_timer.timeout.connect(self._apply_progress_time)
         self.midi_engine.playback_update.connect(self.update_playback_time)
         self.midi_engine.note_on_signal.connect(self.on_playback_note_on)
         self.midi_engine.note_off_signal.connect(self.on_playback_note_off)
+        
+        # Playback note visuals are coalesced and applied once per frame (~60Hz)
+        self._pending_playback_notes = {}  # {note: True (on) / False (off)}, last event wins
+        self._playback_flush_timer = QTimer(self)
+        self._playback_flush_timer.setSingleShot(True)
+        self._playback_flush_timer.setInterval(16)
+        self._playback_flush_timer.timeout.connect(self._flush_playback_notes)
         self.midi_engine.practice_finished.connect(self.show_practice_results)
         
         # Connect Staff (Pentagrama) signals - Staff controls playback visuals and sound
@@ -513,7 +658,6 @@ class MainWindow(QMainWindow):
         self.score_view.note_ended.connect(self.on_staff_note_ended)
         
         # Initialize Training Mode Manager
-        from src.core.training_mode_manager import TrainingModeManager
         self.training_manager = TrainingModeManager(self.midi_engine, self.score_view, self.piano_widget)
         
         # Link training manager to midi_engine
@@ -527,11 +671,10 @@ class MainWindow(QMainWindow):
         self.training_manager.stop_audio.connect(self.on_mode_stop_audio)
         self.training_manager.mode_message.connect(self.on_mode_message)
         self.training_manager.mode_changed.connect(self.on_mode_changed)
+        self._staff_drives_audio = self.training_manager.get_current_mode_name() != 'Practice'
         self.training_manager.song_finished.connect(self.on_song_finished)
         
-        # Connect user input (Arduino/Mouse) to training manager
-        self.arduino.note_on.connect(self.training_manager.on_user_note_press)
-        self.arduino.note_off.connect(self.training_manager.on_user_note_release)
+        # Connect user input (Mouse) to training manager, Arduino input arrives via _drain_arduino_notes
         self.piano_widget.note_pressed.connect(self.training_manager.on_user_note_press)
         self.piano_widget.note_released.connect(self.training_manager.on_user_note_release)
         
@@ -542,16 +685,73 @@ class MainWindow(QMainWindow):
         self.cleanup_timer = QTimer()
         self.cleanup_timer.timeout.connect(self._cleanup_orphaned_keys)
         self.cleanup_timer.start(100)  # Run every 100ms
+        
+        # Start input I/O on the first event-loop tick, once the window is shown and every
+        # Arduino signal above is connected
+        QTimer.singleShot(0, self._start_io)
+
+    def _start_io(self):
+        """Start the Arduino reader thread and MIDI port discovery (deferred from __init__)"""
+        if not self.arduino_thread.isRunning():
+            self.arduino_thread.start()
+            self._arduino_drain_timer.start()
+        # Port enumeration can block for seconds on some backends, so it runs on the
+        # MIDI discovery thread; the MIDI selector then opens without querying the OS
+        if not self.midi_enum_thread.isRunning():
+            self.midi_enum_thread.start()
+        self.midi_scan_requested.emit()
+    
+    def _on_midi_inputs_ready(self, names):
+        """Port list from MidiEnumWorker; refill the open selector only if it changed"""
+        if names == self._cached_midi_inputs:
+            return
+        self._cached_midi_inputs = names
+        if self._midi_selector_populate:
+            self._midi_selector_populate(names)
+    
+    def _drain_arduino_notes(self):
+        """Dispatch all Arduino note events queued since the last tick in one pass"""
+        events = self.arduino.note_events
+        if len(events) > ARDUINO_BACKLOG_WARN:
+            print(f"⚠️ Arduino note backlog: {len(events)} events queued since the last tick")
+        while events:
+            is_on, note, velocity = events.popleft()
+            if is_on:
+                self.midi_engine.register_user_note_on(note, velocity)
+                self.on_arduino_note_on(note, velocity)
+                self.training_manager.on_user_note_press(note, velocity)
+            else:
+                self.midi_engine.register_user_note_off(note)
+                self.on_arduino_note_off(note)
+                self.training_manager.on_user_note_release(note)
+
+    def _add_toolbar_button(self, layout, object_name, icon, tooltip, slot):
+        """Create an icon button styled by TOOLBAR_QSS (via its objectName) and add it to layout"""
+        button = QPushButton()
+        button.setObjectName(object_name)
+        button.setIcon(create_svg_icon(icon))
+        button.setIconSize(TOOLBAR_ICON_SIZE)
+        button.setToolTip(tooltip)
+        button.clicked.connect(slot)
+        layout.addWidget(button)
+        return button
 
     def open_midi(self):
-        file_name, _ = QFileDialog.getOpenFileName(self, "Open MIDI File", "", "MIDI Files (*.mid *.midi)")
+        if self._midi_file_dialog is None:
+            self._midi_file_dialog = QFileDialog(self, "Open MIDI File")
+            self._midi_file_dialog.setNameFilter("MIDI Files (*.mid *.midi)")
+            self._midi_file_dialog.setFileMode(QFileDialog.FileMode.ExistingFile)
+        
+        file_name = None
+        if self._midi_file_dialog.exec():
+            file_name = self._midi_file_dialog.selectedFiles()[0]
         if file_name:
             self.status_label.setText(f"Loading {os.path.basename(file_name)}...")
             if self.midi_engine.load_midi(file_name):
                 # Add to library
                 self.song_library.add_song(file_name)
                 # Load into staff widget
-                self.score_view.load_midi_notes(file_name)
+                self.score_view.load_midi_notes(file_name, self.midi_engine.midi_file)
                 
                 # CRITICAL: Apply current zoom settings after loading MIDI
                 visual_zoom = self.settings.get("visual_zoom", 100)
@@ -576,10 +776,9 @@ class MainWindow(QMainWindow):
                 self.score_view.pixels_per_second = self.score_view.base_pixels_per_second * original_tempo_factor * tempo_multiplier * zoom_scale
                 
                 # Recalculate Y positions only (for staff display)
-                for note in self.score_view.notes:
-                    note['y'] = self.score_view.pitch_to_y(note['pitch'])
+                self.score_view.recalculate_note_positions()
                 
-                print(f"StaffWidget: Applied zoom {visual_zoom}% after loading (pixels_per_second={self.score_view.pixels_per_second:.1f})")
+                logger.debug("StaffWidget: Applied zoom %s%% after loading (pixels_per_second=%.1f)", visual_zoom, self.score_view.pixels_per_second)
                 
                 # Force repaint to show changes immediately
                 self.score_view.update()
@@ -589,8 +788,7 @@ class MainWindow(QMainWindow):
                 
                 # Set progress bar duration
                 if self.midi_engine.events:
-                    total_time = max(evt['time'] for evt in self.midi_engine.events)
-                    self.progress_bar.set_duration(total_time)
+                    self.progress_bar.set_duration(self.midi_engine.total_time)
                 
                 # Check and adapt to piano range
                 self.adapt_song_to_piano()
@@ -627,8 +825,10 @@ class MainWindow(QMainWindow):
             # Apply visual settings to staff
             self.score_view.show_note_colors = self.settings.get("show_staff_note_colors", True)
             
-            # Apply played note color to staff
-            self.score_view.played_note_color = self.get_played_note_color()
+            # Apply played note color to staff and piano
+            played_note_color = self.get_played_note_color()
+            self.score_view.played_note_color = played_note_color
+            self.piano_widget.set_source_color(NoteSource.PLAYBACK, played_note_color)
             
             self.score_view.update()
             
@@ -648,7 +848,7 @@ class MainWindow(QMainWindow):
             mode_name = self.training_manager.get_current_mode_name()
             if mode_name == "Practice":
                 # Start countdown for Practice mode, then start when countdown finishes
-                self.score_view.start_countdown(lambda: self.start_practice_after_countdown())
+                self.score_view.start_countdown(self.start_practice_after_countdown)
                 return
             
             # Start the current training mode (continues from current position)
@@ -663,7 +863,9 @@ class MainWindow(QMainWindow):
             self.setWindowTitle(f"How To Piano - ▶ Playing ({mode_name} Mode)")
             
             # Visual feedback - highlight play button
-            self.btn_pause.setStyleSheet(self.btn_pause.styleSheet().replace("#f39c12", "#e67e22"))
+            self.btn_pause.setProperty("active", True)
+            self.btn_pause.style().unpolish(self.btn_pause)
+            self.btn_pause.style().polish(self.btn_pause)
     
     def pause_playback(self):
         """Pause current training mode"""
@@ -682,8 +884,7 @@ class MainWindow(QMainWindow):
     def stop_playback(self):
         """Stop current training mode and reset"""
         # Stop playback logging
-        if hasattr(self.score_view, 'stop_playback_logging'):
-            self.score_view.stop_playback_logging()
+        self.score_view.stop_playback_logging()
         
         self.training_manager.stop()
         self.midi_engine.timer.stop()
@@ -708,7 +909,12 @@ class MainWindow(QMainWindow):
     
     def open_train_dialog(self):
         """Open training mode selection dialog"""
-        from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QPushButton, QButtonGroup
+        self._ensure_mode_dialog().exec()
+    
+    def _ensure_mode_dialog(self):
+        """Build the training mode dialog once; later opens reuse it"""
+        if self._mode_dialog is not None:
+            return self._mode_dialog
         
         dialog = QDialog(self)
         dialog.setWindowTitle("Select Training Mode")
@@ -721,60 +927,33 @@ class MainWindow(QMainWindow):
         title.setStyleSheet("font-size: 16px; font-weight: bold; margin-bottom: 10px;")
         layout.addWidget(title)
         
-        # Mode buttons
-        btn_play = QPushButton("Reproducir\nSimplemente reproduce la canción")
-        btn_play.setMinimumHeight(60)
-        btn_play.setStyleSheet("text-align: left; padding: 10px;")
-        btn_play.clicked.connect(lambda: self.select_mode("Play", dialog))
-        layout.addWidget(btn_play)
-        
-        btn_master = QPushButton("Maestro\nMuestra y toca automáticamente")
-        btn_master.setMinimumHeight(60)
-        btn_master.setStyleSheet("text-align: left; padding: 10px;")
-        btn_master.clicked.connect(lambda: self.select_mode("Master", dialog))
-        layout.addWidget(btn_master)
-        
-        btn_student = QPushButton("Estudiante\nPrograma toca 4 acordes, tú los repites")
-        btn_student.setMinimumHeight(60)
-        btn_student.setStyleSheet("text-align: left; padding: 10px;")
-        btn_student.clicked.connect(lambda: self.select_mode("Student", dialog))
-        layout.addWidget(btn_student)
-        
-        btn_practice = QPushButton("Práctica\nIlumina teclas, presiónalas para avanzar")
-        btn_practice.setMinimumHeight(60)
-        btn_practice.setStyleSheet("text-align: left; padding: 10px;")
-        btn_practice.clicked.connect(lambda: self.select_mode("Practice", dialog))
-        layout.addWidget(btn_practice)
-        
-        btn_corrector = QPushButton("Corrector\nCorrige errores anteriores")
-        btn_corrector.setMinimumHeight(60)
-        btn_corrector.setStyleSheet("text-align: left; padding: 10px;")
-        btn_corrector.clicked.connect(lambda: self.select_mode("Corrector", dialog))
-        layout.addWidget(btn_corrector)
+        # Mode buttons, styled by one dialog-level rule instead of a stylesheet per button
+        dialog.setStyleSheet(MODE_BUTTON_QSS)
+        for mode, text in TRAINING_MODE_BUTTONS:
+            btn = QPushButton(text)
+            btn.setObjectName("modeButton")
+            btn.setMinimumHeight(60)
+            btn.clicked.connect(partial(self.select_mode, mode, dialog))
+            layout.addWidget(btn)
         
         # Cancel button
         btn_cancel = QPushButton("Cancelar")
         btn_cancel.clicked.connect(dialog.reject)
         layout.addWidget(btn_cancel)
         
-        dialog.exec()
+        self._mode_dialog = dialog
+        return dialog
     
-    def select_mode(self, mode, dialog):
-        """Set training mode and close dialog"""
+    def select_mode(self, mode, dialog, checked=False):
+        """Set training mode and close dialog (checked: unused, sent by QPushButton.clicked)"""
         # Switch to the selected mode
         self.training_manager.set_mode(mode)
         
-        # Update mode label with icon
-        mode_icons = {
-            "Play": "▶️",
-            "Master": "🎹",
-            "Student": "🎓",
-            "Practice": "📝",
-            "Corrector": "✏️"
-        }
-        icon = mode_icons.get(mode, "🎵")
-        self.mode_label.setText(f"{icon} {mode}")
-        self.mode_label.setStyleSheet("color: #3498db; font-size: 12px; font-weight: bold; background-color: #34495e; padding: 5px 10px; border-radius: 3px;")
+        # Update mode label with icon (restyle only on the first switch away from the idle look)
+        self.mode_label.setText(MODE_LABELS.get(mode) or f"🎵 {mode}")
+        if self._mode_label_qss != MODE_LABEL_QSS_ACTIVE:
+            self.mode_label.setStyleSheet(MODE_LABEL_QSS_ACTIVE)
+            self._mode_label_qss = MODE_LABEL_QSS_ACTIVE
         
         dialog.accept()
         
@@ -811,8 +990,6 @@ class MainWindow(QMainWindow):
 
     def open_midi_selector(self):
         """Open MIDI device selector dialog"""
-        from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QPushButton, QListWidget
-        import mido
         
         dialog = QDialog(self)
         dialog.setWindowTitle("Select MIDI Input Device")
@@ -848,29 +1025,42 @@ class MainWindow(QMainWindow):
             }
         """)
         
-        # Add Mock Mode option
-        device_list.addItem("🎭 Mock Mode (Demo)")
+        status_label = QLabel()
         
-        # Detect MIDI devices
-        try:
-            input_names = mido.get_input_names()
+        def populate_devices(input_names):
+            """Fill the list with Mock Mode plus detected MIDI inputs in one model update"""
+            device_list.clear()
+            device_list.addItems(["🎭 Mock Mode (Demo)"] + [f"🎹 {port_name}" for port_name in input_names])
             if input_names:
-                for port_name in input_names:
-                    device_list.addItem(f"🎹 {port_name}")
+                status_label.hide()
             else:
-                info_label = QLabel("No MIDI devices detected")
-                info_label.setStyleSheet("color: #95a5a6; font-style: italic;")
-                layout.addWidget(info_label)
-        except Exception as e:
-            error_label = QLabel(f"Error detecting MIDI devices: {e}")
-            error_label.setStyleSheet("color: #e74c3c;")
-            layout.addWidget(error_label)
+                status_label.setText("No MIDI devices detected")
+                status_label.setStyleSheet("color: #95a5a6; font-style: italic;")
+                status_label.show()
         
+        # Normally the discovery thread has already filled the cache
+        if self._cached_midi_inputs is None:
+            try:
+                self._cached_midi_inputs = list(get_midi_input_names())
+            except Exception as e:
+                status_label.setText(f"Error detecting MIDI devices: {e}")
+                status_label.setStyleSheet("color: #e74c3c;")
+        if self._cached_midi_inputs is not None:
+            populate_devices(self._cached_midi_inputs)
+        else:
+            device_list.addItem("🎭 Mock Mode (Demo)")
+        self._midi_selector_populate = populate_devices
+        layout.addWidget(status_label)
         layout.addWidget(device_list)
         
         # Buttons
         btn_layout = QHBoxLayout()
         
+        btn_rescan = QPushButton("Rescan")
+        btn_rescan.setToolTip("Search for MIDI devices again")
+        btn_rescan.clicked.connect(self.midi_scan_requested)
+        btn_layout.addWidget(btn_rescan)
+        
         btn_cancel = QPushButton("Cancel")
         btn_cancel.clicked.connect(dialog.reject)
         btn_layout.addWidget(btn_cancel)
@@ -889,7 +1079,7 @@ class MainWindow(QMainWindow):
                 background-color: #2ecc71;
             }
         """)
-        btn_select.clicked.connect(lambda: self.select_midi_device(device_list.currentItem(), dialog))
+        btn_select.clicked.connect(partial(self.select_midi_device, device_list, dialog))
         btn_layout.addWidget(btn_select)
         
         layout.addLayout(btn_layout)
@@ -899,9 +1089,11 @@ class MainWindow(QMainWindow):
             device_list.setCurrentRow(0)
         
         dialog.exec()
+        self._midi_selector_populate = None
     
-    def select_midi_device(self, item, dialog):
-        """Select MIDI device from list"""
+    def select_midi_device(self, device_list, dialog, checked=False):
+        """Select the device highlighted in the selector list"""
+        item = device_list.currentItem()
         if not item:
             return
         
@@ -912,7 +1104,7 @@ class MainWindow(QMainWindow):
             self.midi_connected = False
             self.midi_device_name = "Mock Mode"
             self.midi_port = None
-            print("✅ Switched to Mock Mode")
+            logger.debug("✅ Switched to Mock Mode")
             self.update_midi_indicator()
         else:
             # Extract device name (remove emoji)
@@ -923,10 +1115,9 @@ class MainWindow(QMainWindow):
                 # For now, just update the indicator
                 self.midi_connected = True
                 self.midi_device_name = device_name
-                print(f"✅ Selected MIDI device: {device_name}")
+                logger.debug("✅ Selected MIDI device: %s", device_name)
                 self.update_midi_indicator()
             except Exception as e:
-                from PyQt6.QtWidgets import QMessageBox
                 QMessageBox.critical(dialog, "Error", f"Failed to connect to MIDI device:\n{e}")
                 return
         
@@ -971,28 +1162,23 @@ class MainWindow(QMainWindow):
     
     def change_sound(self, sound_name):
         # Map names to program numbers (General MIDI)
-        sound_map = {
-            "Classic Piano": 0,
-            "Electric Piano": 4,
-            "Organ": 19
-        }
-        prog = sound_map.get(sound_name, 0)
+        prog = SOUND_PROGRAMS.get(sound_name, 0)
         self.synth.set_instrument(prog)
     
     def change_clef(self, index):
         """Change musical clef type"""
-        clef_types = ["grand", "treble", "bass", "alto", "tenor", "soprano", "mezzosoprano", "baritone"]
-        if index < len(clef_types):
-            self.score_view.clef_type = clef_types[index]
+        if index < len(CLEF_TYPES):
+            self.score_view.clef_type = CLEF_TYPES[index]
             # Recalculate note positions for new clef
             if self.score_view.notes:
-                for note in self.score_view.notes:
-                    note['y'] = self.score_view.pitch_to_y(note['pitch'])
+                self.score_view.recalculate_note_positions()
             self.score_view.update()
-            print(f"Clef changed to: {clef_types[index]}")
+            logger.debug("Clef changed to: %s", CLEF_TYPES[index])
     
     def change_zoom(self, value):
         """Change visual zoom (pixels per second)"""
+        if value == self.settings.get("visual_zoom"):
+            return  # Slider/spinbox echo of the current value, nothing to recompute
         self.settings["visual_zoom"] = value
         
         # Update spinbox without triggering another change event
@@ -1000,6 +1186,19 @@ class MainWindow(QMainWindow):
         self.zoom_spinbox.setValue(value)
         self.zoom_spinbox.blockSignals(False)
         
+        # Recompute the staff on the next throttle tick with the latest value
+        self._pending_zoom = value
+        if not self._zoom_timer.isActive():
+            self._zoom_timer.start()
+        self._trigger_reset_timer.start()
+    
+    def _apply_zoom(self):
+        """Apply the latest pending zoom value to the staff (throttled from change_zoom)"""
+        value = self._pending_zoom
+        if value is None:
+            return
+        self._pending_zoom = None
+        
         # Update visual zoom scale for staff appearance
         zoom_scale = value / 100.0
         self.score_view.visual_zoom_scale = zoom_scale
@@ -1016,22 +1215,18 @@ class MainWindow(QMainWindow):
         
         # Recalculate Y positions if a song is loaded (for staff display)
         if self.score_view.notes:
-            for note in self.score_view.notes:
-                # Recalculate y position with new staff spacing
-                note['y'] = self.score_view.pitch_to_y(note['pitch'])
-            
-            # Reset trigger state to prevent skipping notes
-            self.score_view.reset_triggers()
-            
+            self.score_view.recalculate_note_positions()
             self.score_view.update()
         
-        # Save settings
-        self.save_settings()
+        # Save settings (debounced)
+        self.schedule_settings_save()
         tempo_mult = self.settings.get("playback_tempo", 100)
-        print(f"Visual zoom changed to {value}% (scroll speed: {self.score_view.pixels_per_second:.1f} px/s, tempo: {tempo_mult}%)")
+        logger.debug("Visual zoom changed to %s%% (scroll speed: %.1f px/s, tempo: %s%%)", value, self.score_view.pixels_per_second, tempo_mult)
     
     def change_tempo(self, value):
         """Change playback tempo (actual speed of music)"""
+        if value == self.settings.get("playback_tempo"):
+            return  # Slider/spinbox echo of the current value, nothing to recompute
         self.settings["playback_tempo"] = value
         
         # Update spinbox without triggering another change event
@@ -1039,6 +1234,19 @@ class MainWindow(QMainWindow):
         self.tempo_spinbox.setValue(value)
         self.tempo_spinbox.blockSignals(False)
         
+        # Recompute tempo-dependent state on the next throttle tick with the latest value
+        self._pending_tempo = value
+        if not self._tempo_timer.isActive():
+            self._tempo_timer.start()
+        self._trigger_reset_timer.start()
+    
+    def _apply_tempo(self):
+        """Apply the latest pending tempo value (throttled from change_tempo)"""
+        value = self._pending_tempo
+        if value is None:
+            return
+        self._pending_tempo = None
+        
         # Update the tempo multiplier in training modes
         if self.training_manager:
             for mode in self.training_manager.modes.values():
@@ -1052,16 +1260,12 @@ class MainWindow(QMainWindow):
         tempo_multiplier = value / 100.0
         self.score_view.pixels_per_second = self.score_view.base_pixels_per_second * original_tempo_factor * tempo_multiplier * self.score_view.visual_zoom_scale
         
-        # Reset trigger state when tempo changes
         if self.score_view.notes:
             self.score_view.update()
         
-        # CRITICAL: Reset trigger state to prevent skipping notes
-        self.score_view.reset_triggers()
-        
-        # Save settings
-        self.save_settings()
-        print(f"Playback tempo changed to {value}% (scroll speed: {self.score_view.pixels_per_second:.1f} px/s)")
+        # Save settings (debounced)
+        self.schedule_settings_save()
+        logger.debug("Playback tempo changed to %s%% (scroll speed: %.1f px/s)", value, self.score_view.pixels_per_second)
 
     def on_zoom_spinbox_changed(self, value):
         """Handle zoom spinbox value changes"""
@@ -1085,12 +1289,12 @@ class MainWindow(QMainWindow):
     
     def load_song_from_library(self, song_id, path):
         """Load a song from the library"""
-        print(f"MainWindow: Loading song_id={song_id}, path={path}")
+        logger.debug("MainWindow: Loading song_id=%s, path=%s", song_id, path)
         song = self.song_library.get_song_by_id(song_id)
         if song:
             # Use the path from the song metadata, not the signal parameter
             actual_path = song['path']
-            print(f"MainWindow: Using actual path: {actual_path}")
+            logger.debug("MainWindow: Using actual path: %s", actual_path)
             self.status_label.setText(f"Loading {song['name']}...")
             if os.path.exists(actual_path):
                 if self.midi_engine.load_midi(actual_path):
@@ -1099,8 +1303,8 @@ class MainWindow(QMainWindow):
                         practice_mode = self.training_manager.modes.get('practice')
                         if practice_mode:
                             practice_mode.song_uuid = song_id
-                            print(f"MainWindow: Set Practice Mode song_uuid to {song_id}")
-                    self.score_view.load_midi_notes(actual_path)
+                            logger.debug("MainWindow: Set Practice Mode song_uuid to %s", song_id)
+                    self.score_view.load_midi_notes(actual_path, self.midi_engine.midi_file)
                     
                     # CRITICAL: Apply current zoom settings after loading MIDI
                     # This ensures tempo calculation includes the correct zoom factor
@@ -1126,18 +1330,16 @@ class MainWindow(QMainWindow):
                     self.score_view.pixels_per_second = self.score_view.base_pixels_per_second * original_tempo_factor * tempo_multiplier * zoom_scale
                     
                     # Recalculate Y positions only (for staff display)
-                    for note in self.score_view.notes:
-                        note['y'] = self.score_view.pitch_to_y(note['pitch'])
+                    self.score_view.recalculate_note_positions()
                     
-                    print(f"StaffWidget: Applied zoom {visual_zoom}% after loading (pixels_per_second={self.score_view.pixels_per_second:.1f})")
+                    logger.debug("StaffWidget: Applied zoom %s%% after loading (pixels_per_second=%.1f)", visual_zoom, self.score_view.pixels_per_second)
                     
                     # Force repaint to show changes immediately
                     self.score_view.update()
                     
                     # Set progress bar duration
                     if self.midi_engine.events:
-                        total_time = max(evt['time'] for evt in self.midi_engine.events)
-                        self.progress_bar.set_duration(total_time)
+                        self.progress_bar.set_duration(self.midi_engine.total_time)
                     
                     # Check and adapt to piano range
                     self.adapt_song_to_piano()
@@ -1150,50 +1352,50 @@ class MainWindow(QMainWindow):
                     
                     # Reset to start position LAST - after all other operations
                     # Use QTimer to ensure it happens after all pending UI updates
-                    from PyQt6.QtCore import QTimer
                     QTimer.singleShot(50, self.score_view.go_to_start)
                 else:
                     QMessageBox.critical(self, "Error", "Failed to load song.")
             else:
                 QMessageBox.critical(self, "Error", f"Song file not found: {actual_path}")
     
+    @pyqtSlot(float)
     def update_playback_time(self, time_sec):
-        # Update progress bar and score
-        self.progress_bar.set_time(time_sec)
+        # The score runs every tick: it fires note triggers as notes cross the red line
         self.score_view.set_playback_time(time_sec)
+        
+        # The progress bar only needs ~30 updates per second
+        self._pending_progress_time = time_sec
+        if not self._progress_timer.isActive():
+            self._progress_timer.start()
+    
+    def _apply_progress_time(self):
+        """Show the latest pending playback time on the progress bar (throttled)"""
+        time_sec = self._pending_progress_time
+        if time_sec is None:
+            return
+        self._pending_progress_time = None
+        self.progress_bar.set_time(time_sec)
     
     def seek_to_time(self, time_sec):
         """Seek to specific time in song"""
-        # Reset staff triggers when seeking
+        # Reset staff triggers and drop held notes with one bulk clear
+        # instead of 128 per-note note_off signals
         self.score_view.reset_triggers()
+        self._clear_all_active_notes()
         
-        if hasattr(self.midi_engine, 'seek'):
-            self.midi_engine.seek(time_sec)
-        else:
-            # Simple seek by stopping and adjusting
-            was_playing = self.midi_engine.is_playing
-            self.midi_engine.stop()
-            self.midi_engine.paused_at = time_sec
-            if was_playing:
-                self.midi_engine.play()
+        self.midi_engine.seek(time_sec)
 
-    def _activate_piano_key(self, pitch, velocity, color=None, play_audio=True):
+    def _activate_piano_key(self, pitch, velocity, source=NoteSource.PLAYBACK, play_audio=True):
         """Centralized method to activate a piano key with visual and audio"""
         # Register as expected active note
         self.expected_active_notes.add(pitch)
         
         # Play audio if requested
         if play_audio:
-            def play_note_async():
-                self.midi_engine.synth.note_on(pitch, velocity)
-                if self.midi_engine.audio_type in ['maestro', 'pygame']:
-                    self.midi_engine._play_note_pygame(pitch, velocity)
-            threading.Thread(target=play_note_async, daemon=True).start()
+            self._audio_queue.put(('on', pitch, velocity))
         
         # Visual feedback
-        if color is None:
-            color = self.get_played_note_color()
-        self.piano_widget.note_on(pitch, color)
+        self.piano_widget.note_on(pitch, source)
         self.score_view.note_on(pitch)
     
     def _deactivate_piano_key(self, pitch, stop_audio=True):
@@ -1203,49 +1405,58 @@ class MainWindow(QMainWindow):
         
         # Stop audio if requested
         if stop_audio:
-            def stop_note_async():
-                self.midi_engine.synth.note_off(pitch)
-                if self.midi_engine.audio_type in ['maestro', 'pygame']:
-                    self.midi_engine._stop_note_pygame(pitch)
-            threading.Thread(target=stop_note_async, daemon=True).start()
+            self._audio_queue.put(('off', pitch, 0))
         
         # Visual feedback
         self.piano_widget.note_off(pitch)
         self.score_view.note_off(pitch)
     
+    @pyqtSlot(int, int)
     def on_staff_note_triggered(self, pitch, velocity):
         """Called when a note crosses the red line on the staff"""
         # In Practice mode, NEVER auto-play - user must press keys manually
-        should_play = True
-        if hasattr(self, 'training_manager'):
-            mode_name = self.training_manager.get_current_mode_name()
-            if mode_name == 'Practice':
-                should_play = False  # Show visual but no audio
-        
-        self._activate_piano_key(pitch, velocity, play_audio=should_play)
+        self._activate_piano_key(pitch, velocity, play_audio=self._staff_drives_audio)
     
+    @pyqtSlot(int)
     def on_staff_note_ended(self, pitch):
         """Called when a note ends (crosses red line + duration)"""
         # In Practice mode, don't auto-stop - user controls audio
-        should_stop = True
-        if hasattr(self, 'training_manager'):
-            mode_name = self.training_manager.get_current_mode_name()
-            if mode_name == 'Practice':
-                should_stop = False  # User controls when to stop
-        
-        self._deactivate_piano_key(pitch, stop_audio=should_stop)
+        self._deactivate_piano_key(pitch, stop_audio=self._staff_drives_audio)
     
+    @pyqtSlot(int, int)
     def on_playback_note_on(self, note, velocity):
         """Called when the MIDI file plays a note"""
-        self._activate_piano_key(note, velocity, play_audio=False)
+        self.expected_active_notes.add(note)
+        self._pending_playback_notes[note] = True
+        if not self._playback_flush_timer.isActive():
+            self._playback_flush_timer.start()
         
+    @pyqtSlot(int)
     def on_playback_note_off(self, note):
         """Called when the MIDI file stops a note"""
-        self._deactivate_piano_key(note, stop_audio=False)
+        self.expected_active_notes.discard(note)
+        self._pending_playback_notes[note] = False
+        if not self._playback_flush_timer.isActive():
+            self._playback_flush_timer.start()
+    
+    def _flush_playback_notes(self):
+        """Apply all playback note changes since the last frame with one repaint per widget"""
+        pending = self._pending_playback_notes
+        self._pending_playback_notes = {}
+        notes_on = [note for note, is_on in pending.items() if is_on]
+        notes_off = [note for note, is_on in pending.items() if not is_on]
+        
+        if notes_off:
+            self.piano_widget.notes_off(notes_off)
+            for note in notes_off:
+                self.score_view.note_off(note)
+        if notes_on:
+            self.piano_widget.notes_on(notes_on, NoteSource.PLAYBACK)
+            self.score_view.notes_on(notes_on)
     
     def on_arduino_note_on(self, note, velocity):
         """Called when Arduino detects a note press"""
-        self._activate_piano_key(note, velocity, QColor(255, 140, 0), play_audio=False)
+        self._activate_piano_key(note, velocity, NoteSource.USER, play_audio=False)
     
     def on_arduino_note_off(self, note):
         """Called when Arduino detects a note release"""
@@ -1253,7 +1464,7 @@ class MainWindow(QMainWindow):
     
     def on_user_note_pressed(self, note, velocity):
         """Called when user clicks piano key"""
-        self._activate_piano_key(note, velocity, QColor(255, 140, 0), play_audio=False)
+        self._activate_piano_key(note, velocity, NoteSource.USER, play_audio=False)
     
     def on_user_note_released(self, note):
         """Called when user releases piano key"""
@@ -1267,30 +1478,15 @@ class MainWindow(QMainWindow):
     
     def sync_finger_assignments(self):
         """Sync finger assignments from staff to piano widget"""
-        self.piano_widget.clear_finger_assignments()
-        
-        # Get unique pitches and their assigned fingers from the staff
-        pitch_to_finger = {}
-        for note in self.score_view.notes:
-            pitch = note['pitch']
-            note_id = note['id']
-            finger = self.score_view.get_finger_for_note(note_id)
-            
-            # Use the first finger assignment we see for each pitch
-            if pitch not in pitch_to_finger:
-                pitch_to_finger[pitch] = finger
-        
-        # Apply to piano widget
-        for pitch, finger in pitch_to_finger.items():
-            self.piano_widget.set_finger_assignment(pitch, finger)
+        # The staff keeps the first finger per pitch up to date as it assigns fingers
+        pitch_to_finger = self.score_view.pitch_to_finger
+        self.piano_widget.set_finger_assignments(pitch_to_finger)
         
-        print(f"MainWindow: Synced {len(pitch_to_finger)} finger assignments to piano")
+        logger.debug("MainWindow: Synced %s finger assignments to piano", len(pitch_to_finger))
     
     def show_practice_results(self, evaluation):
         """Show practice results dialog with star rating"""
-        from src.ui.results_dialog import ResultsDialog
-        
-        results_dlg = ResultsDialog(evaluation, self)
+        results_dlg = _results_dialog_class()(evaluation, self)
         if results_dlg.exec():
             # User clicked "Try Again"
             self.stop_playback()
@@ -1302,31 +1498,26 @@ class MainWindow(QMainWindow):
             self.mode_label.setText("🎹 Master")
             self.setWindowTitle("How To Piano")
     
+    @pyqtSlot(int, object)
     def on_mode_note_highlight(self, pitch, color):
-        """Training mode wants to highlight a piano key"""
-        self._activate_piano_key(pitch, 80, color, play_audio=False)
+        """Training mode wants to highlight a piano key (a color means wrong-note feedback)"""
+        source = NoteSource.PLAYBACK if color is None else NoteSource.ERROR
+        self._activate_piano_key(pitch, 80, source, play_audio=False)
     
+    @pyqtSlot(int)
     def on_mode_note_unhighlight(self, pitch):
         """Training mode wants to unhighlight a piano key"""
         self._deactivate_piano_key(pitch, stop_audio=False)
     
+    @pyqtSlot(int, int)
     def on_mode_play_audio(self, pitch, velocity):
         """Training mode wants to play audio"""
-        import threading
-        def play_async():
-            self.midi_engine.synth.note_on(pitch, velocity)
-            if self.midi_engine.audio_type in ['maestro', 'pygame']:
-                self.midi_engine._play_note_pygame(pitch, velocity)
-        threading.Thread(target=play_async, daemon=True).start()
+        self._audio_queue.put(('on', pitch, velocity))
     
+    @pyqtSlot(int)
     def on_mode_stop_audio(self, pitch):
         """Training mode wants to stop audio"""
-        import threading
-        def stop_async():
-            self.midi_engine.synth.note_off(pitch)
-            if self.midi_engine.audio_type in ['maestro', 'pygame']:
-                self.midi_engine._stop_note_pygame(pitch)
-        threading.Thread(target=stop_async, daemon=True).start()
+        self._audio_queue.put(('off', pitch, 0))
     
     def on_mode_message(self, message):
         """Training mode sends status message"""
@@ -1334,62 +1525,71 @@ class MainWindow(QMainWindow):
     
     def on_mode_changed(self, mode_name):
         """Training mode changed"""
-        print(f"MainWindow: Training mode changed to {mode_name}")
+        logger.debug("MainWindow: Training mode changed to %s", mode_name)
+        # Staff crossings stay connected in every mode (they drive the key
+        # highlights); only Practice mode mutes their audio
+        self._staff_drives_audio = mode_name != 'Practice'
     
     def on_song_finished(self):
         """Called when song finishes playing - wait 3 seconds before stopping to let last note fade"""
-        print("MainWindow: Song finished, waiting 3 seconds for last note to fade...")
-        from PyQt6.QtCore import QTimer
+        logger.debug("MainWindow: Song finished, waiting 3 seconds for last note to fade...")
         QTimer.singleShot(3000, self.stop_playback)  # Wait 3 seconds before stopping
     
     def _clear_all_active_notes(self):
         """Clear all highlighted keys and stop all sounds"""
         
-        # Clear staff widget active notes first
-        if hasattr(self.score_view, 'active_note_ids'):
-            self.score_view.active_note_ids.clear()
+        # Clear staff widget active notes first, then the piano keys (one repaint each)
+        self.score_view.clear_active_notes()
+        self.piano_widget.clear_notes()
         
-        # Clear piano widget active notes
-        if hasattr(self.piano_widget, 'active_notes'):
-            self.piano_widget.active_notes.clear()
-        
-        # Clear expected active notes
+        # Clear expected active notes and drop playback visuals not yet flushed
         self.expected_active_notes.clear()
+        self._pending_playback_notes.clear()
         
-        # Turn off all piano keys (88 keys from MIDI 21 to 108)
-        for note in range(21, 109):
-            self.piano_widget.note_off(note)
-            self.score_view.note_off(note)
-            
-            # Stop audio for each note
-            def stop_async(pitch):
-                try:
+        # Key highlights were cleared above, so only audio is left to stop.
+        # The audio thread silences everything with one bulk stop per backend
+        self._audio_queue.put(('all_off', 0, 0))
+    
+    def _audio_worker(self):
+        """Play queued note requests in order (runs on the audio thread until a None item)"""
+        get = self._audio_queue.get
+        while True:
+            item = get()
+            if item is None:
+                return
+            op, pitch, velocity = item
+            try:
+                if op == 'on':
+                    self.midi_engine.synth.note_on(pitch, velocity)
+                    if self.midi_engine.audio_type in ['maestro', 'pygame']:
+                        self.midi_engine._play_note_pygame(pitch, velocity)
+                elif op == 'off':
                     self.midi_engine.synth.note_off(pitch)
                     if self.midi_engine.audio_type in ['maestro', 'pygame']:
                         self.midi_engine._stop_note_pygame(pitch)
-                except Exception as e:
-                    pass  # Ignore errors for notes that weren't playing
-            
-            threading.Thread(target=lambda n=note: stop_async(n), daemon=True).start()
+                else:
+                    self._stop_all_note_audio()
+            except Exception as e:
+                print(f"Audio error ({op} {pitch}): {e}")
+    
+    def _stop_all_note_audio(self):
+        """Silence every sounding note (runs on the audio thread)"""
+        self.midi_engine.synth.all_notes_off()
         
-        # Also stop maestro sampler if available
-        if hasattr(self.midi_engine, 'maestro_sampler') and self.midi_engine.maestro_sampler:
+        # Also stop maestro sampler if available, else any pygame tones still playing
+        if self.midi_engine.maestro_sampler:
             try:
                 self.midi_engine.maestro_sampler.stop_all()
             except Exception as e:
                 print(f"Error stopping maestro sampler: {e}")
-        
-        # Force UI update
-        self.piano_widget.update()
-        self.score_view.update()
+        elif self.midi_engine.audio_type == 'pygame':
+            for pitch in list(self.midi_engine.active_sounds):
+                self.midi_engine._stop_note_pygame(pitch)
     
     def _cleanup_orphaned_keys(self):
         """Remove stuck keys that shouldn't be active (runs every 100ms)"""
         # Get currently active notes from piano widget
-        if not hasattr(self.piano_widget, 'active_notes'):
-            return
-        
-        current_active = set(self.piano_widget.active_notes.keys())
+        current_active = self.piano_widget.lit_notes()
         
         # Find notes that are active but shouldn't be
         orphaned_notes = current_active - self.expected_active_notes
@@ -1455,11 +1655,27 @@ class MainWindow(QMainWindow):
         
         return default_settings
     
+    def schedule_settings_save(self):
+        """Write settings 500ms after the last change instead of on every change"""
+        self._settings_save_timer.start()
+    
     def save_settings(self):
-        """Save settings to file"""
+        """Save settings to file now (also flushes a pending debounced save)"""
+        self._settings_save_timer.stop()
+        # Serialize here (cheap) so the writer never sees self.settings mid-change
         try:
-            with open(self.settings_file, 'w') as f:
-                json.dump(self.settings, f, indent=2)
+            data = json.dumps(self.settings, indent=2)
+        except Exception as e:
+            print(f"Error saving settings: {e}")
+            return
+        self._settings_writer.submit(self._write_settings_file, self.settings_file, data)
+    
+    @staticmethod
+    def _write_settings_file(path, data):
+        """Write serialized settings to disk (runs on the settings writer thread)"""
+        try:
+            with open(path, 'w') as f:
+                f.write(data)
         except Exception as e:
             print(f"Error saving settings: {e}")
     
@@ -1568,52 +1784,52 @@ class MainWindow(QMainWindow):
             self.btn_arduino.setToolTip("Arduino: Disconnected")
     
     def send_arduino_led_on(self, midi_note, velocity=100):
-        """Send LED ON command to Arduino when piano key is pressed"""
+        """Queue LED ON for a piano key (sent with the next BATCH flush)"""
         if not self.arduino_connected or not self.arduino_serial:
             return
         
-        try:
-            command = f"ON:{midi_note}:{velocity}\\n"
-            self.arduino_serial.write(command.encode())
-            
-            # Log to console if open
-            if self.arduino_console_dialog and self.arduino_console_dialog.isVisible():
-                self.arduino_console_dialog.log_sent(command.strip())
-                
-                # Read response
-                time.sleep(0.01)
-                if self.arduino_serial.in_waiting > 0:
-                    response = self.arduino_serial.readline().decode('utf-8', errors='ignore').strip()
-                    if response:
-                        self.arduino_console_dialog.log_received(response)
-        
-        except Exception as e:
-            print(f"Error sending LED ON: {e}")
-            self.arduino_connected = False
-            self.update_arduino_indicator()
+        self._pending_led_ops[midi_note] = velocity
+        self._schedule_led_flush()
     
     def send_arduino_led_off(self, midi_note):
-        """Send LED OFF command to Arduino when piano key is released"""
+        """Queue LED OFF for a piano key (sent with the next BATCH flush)"""
+        if not self.arduino_connected or not self.arduino_serial:
+            return
+        
+        self._pending_led_ops[midi_note] = 0
+        self._schedule_led_flush()
+    
+    def _schedule_led_flush(self):
+        """Flush queued LED changes once control returns to the event loop"""
+        if not self._led_flush_scheduled:
+            self._led_flush_scheduled = True
+            QTimer.singleShot(0, self._flush_arduino_leds)
+    
+    def _flush_arduino_leds(self):
+        """Send all queued LED changes in one BATCH command (one serial write, one FastLED.show)"""
+        self._led_flush_scheduled = False
+        if not self._pending_led_ops:
+            return
+        
+        ops = self._pending_led_ops
+        self._pending_led_ops = {}
+        
         if not self.arduino_connected or not self.arduino_serial:
             return
         
         try:
-            command = f"OFF:{midi_note}\\n"
-            self.arduino_serial.write(command.encode())
+            # BATCH:note,r,g,b;... - same green scaling as the firmware's ON:note:brightness
+            command = "BATCH:" + ";".join(
+                f"{note},0,{min(255, brightness * 255 // 100)},0" for note, brightness in ops.items()
+            )
+            self.arduino_serial.write((command + "\n").encode())
             
             # Log to console if open
             if self.arduino_console_dialog and self.arduino_console_dialog.isVisible():
-                self.arduino_console_dialog.log_sent(command.strip())
-                
-                # Read response
-                time.sleep(0.01)
-                if self.arduino_serial.in_waiting > 0:
-                    response = self.arduino_serial.readline().decode('utf-8', errors='ignore').strip()
-                    if response:
-                        self.arduino_console_dialog.log_received(response)
+                self.arduino_console_dialog.log_sent(command)
         
         except Exception as e:
-            print(f"Error sending LED OFF: {e}")
+            print(f"Error sending LED batch: {e}")
             self.arduino_connected = False
             self.update_arduino_indicator()
     
@@ -1636,39 +1852,12 @@ class MainWindow(QMainWindow):
         print("🛑 Cerrando aplicación...")
         
         try:
-            # 1. Stop MIDI playback
-            if hasattr(self, 'midi_engine') and self.midi_engine:
-                print("  - Deteniendo MIDI engine...")
-                self.midi_engine.stop()
-                self.midi_engine.cleanup()
-            
-            # 2. Stop all audio
-            if hasattr(self, 'synth') and self.synth:
-                print("  - Deteniendo sintetizador...")
-                self.synth.all_notes_off()
-                self.synth.cleanup()
-            
-            # 3. Stop Arduino thread
-            if hasattr(self, 'arduino') and self.arduino:
-                print("  - Deteniendo Arduino...")
-                self.arduino.stop()
-            
-            if hasattr(self, 'arduino_thread') and self.arduino_thread:
-                self.arduino_thread.quit()
-                self.arduino_thread.wait(1000)  # Wait max 1 second
+            # 0. Let the audio thread finish its queued notes before the synth,
+            #    sampler and pygame mixer it calls into are torn down
+            if hasattr(self, '_audio_queue'):
+                self._audio_queue.put(None)
+                self._audio_thread.join(timeout=1.0)  # Wait max 1 second
             
-            # 4. Save settings
-            self.save_settings()
-            print("✅ Aplicación cerrada correctamente")
-            
-        except Exception as e:
-            print(f"⚠️ Error al cerrar: {e}")
-        finally:
-            event.accept()
-        """Clean shutdown of all components"""
-        print("🛑 Cerrando aplicación...")
-        
-        try:
             # 1. Stop MIDI playback
             if hasattr(self, 'midi_engine') and self.midi_engine:
                 print("  - Deteniendo MIDI engine...")
@@ -1690,6 +1879,10 @@ class MainWindow(QMainWindow):
                 self.arduino_thread.quit()
                 self.arduino_thread.wait(1000)  # Wait max 1 second
             
+            if hasattr(self, 'midi_enum_thread') and self.midi_enum_thread:
+                self.midi_enum_thread.quit()
+                self.midi_enum_thread.wait(1000)
+            
             # 4. Close Arduino connection
             if hasattr(self, 'arduino_serial') and self.arduino_serial:
                 print("  - Cerrando conexión Arduino...")
@@ -1698,8 +1891,9 @@ class MainWindow(QMainWindow):
                 except:
                     pass
             
-            # 5. Save settings
+            # 5. Save settings and wait for the write to reach disk
             self.save_settings()
+            self._settings_writer.shutdown(wait=True)
             print("✅ Aplicación cerrada correctamente")
             
         except Exception as e:
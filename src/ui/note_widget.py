@@ -67,6 +67,13 @@ class NoteWidget:
     Maneja su propio renderizado, posición y propiedades.
     """
     
+    # Sin __dict__ por instancia: una canción puede tener miles de notas
+    __slots__ = (
+        'pitch', 'start_time', 'duration', 'velocity', 'tempo',
+        'duration_beats', 'note_type', '_props', 'is_played',
+        'is_correct', 'finger', '_x', '_y', '_old_id'
+    )
+    
     def __init__(
         self,
         pitch: int,
@@ -102,8 +109,8 @@ class NoteWidget:
         else:
             self.note_type = NoteType.from_duration(self.duration_beats)
         
-        # Propiedades visuales
-        self.props = NoteProperties()
+        # Propiedades visuales (se crean al dibujar la nota por primera vez)
+        self._props = None
         
         # Estado visual
         self.is_played = False
@@ -113,6 +120,16 @@ class NoteWidget:
         # Posición calculada (se actualiza en render)
         self._x = 0.0
         self._y = 0.0
+        
+        # ID de la nota original en StaffWidget.notes
+        self._old_id = None
+    
+    @property
+    def props(self) -> NoteProperties:
+        """Propiedades visuales, creadas solo para las notas que se llegan a dibujar"""
+        if self._props is None:
+            self._props = NoteProperties()
+        return self._props
     
     def get_end_time(self) -> float:
         """Retorna el tiempo de finalización de la nota"""
@@ -1,7 +1,21 @@
+import sys
+from enum import IntEnum
 from PyQt6.QtWidgets import QWidget
 from PyQt6.QtCore import Qt, QRectF, pyqtSignal
 from PyQt6.QtGui import QPainter, QColor, QBrush, QPen, QMouseEvent, QFont
 
+# Key labels for all 128 MIDI notes (e.g., C4, D#5), built once at import.
+# Interned so every occurrence of a pitch shares one string object.
+_PITCH_CLASSES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+NOTE_NAMES = tuple(sys.intern(f"{_PITCH_CLASSES[n % 12]}{(n // 12) - 1}") for n in range(128))
+
+class NoteSource(IntEnum):
+    """Who lit a key, indexes PianoWidget.source_brushes"""
+    PLAYBACK = 0  # Song playback / training mode guidance
+    USER = 1      # Arduino, MIDI keyboard or mouse input
+    ERROR = 2     # Wrong-note feedback in Practice mode
+
+
 class PianoWidget(QWidget):
     # Signals for mouse interaction
     note_pressed = pyqtSignal(int, int)  # note, velocity
@@ -12,7 +26,15 @@ class PianoWidget(QWidget):
         self.num_keys = num_keys
         self.start_note = 21 # Default for 88 keys (A0)
         self.physical_keys = num_keys  # Actual physical piano size
-        self.active_notes = {} # {note: color}
+        # Lit keys indexed by MIDI note: 0 = off, otherwise NoteSource + 1.
+        # A flat bytearray keeps key events and the paint scan free of dict work
+        self.active_notes = bytearray(128)
+        # One prebuilt brush per NoteSource, so lighting a key allocates nothing
+        self.source_brushes = [
+            QBrush(QColor(0, 120, 255)),   # PLAYBACK - electric blue (settings can override)
+            QBrush(QColor(255, 140, 0)),   # USER - bright orange
+            QBrush(QColor(255, 0, 0)),     # ERROR - red
+        ]
         self.mouse_pressed_notes = set()  # Track notes pressed by mouse
         self.update_range()
         self.setMinimumHeight(100)
@@ -56,16 +78,52 @@ class PianoWidget(QWidget):
             self.start_note = 36 # C2
         else:
             self.start_note = 21
+        
+        # White key count only changes with the range, not on every repaint
+        self.white_keys_count = sum(1 for i in range(self.num_keys)
+                                    if not self.is_black(self.start_note + i))
+
+    def set_source_color(self, source, color):
+        """Set the highlight color used for keys lit by the given NoteSource"""
+        self.source_brushes[source] = QBrush(color)
+        self.update()
 
-    def note_on(self, note, color):
+    def note_on(self, note, source=NoteSource.PLAYBACK):
         if self.show_active_note_colors:
-            self.active_notes[note] = color
+            self.active_notes[note] = source + 1
             self.update()
 
     def note_off(self, note):
-        if note in self.active_notes:
-            del self.active_notes[note]
+        if self.active_notes[note]:
+            self.active_notes[note] = 0
+            self.update()
+
+    def notes_on(self, notes, source=NoteSource.PLAYBACK):
+        """Highlight several keys with a single repaint"""
+        if self.show_active_note_colors and notes:
+            state = source + 1
+            for note in notes:
+                self.active_notes[note] = state
+            self.update()
+
+    def notes_off(self, notes):
+        """Release several keys with a single repaint"""
+        removed = False
+        for note in notes:
+            if self.active_notes[note]:
+                self.active_notes[note] = 0
+                removed = True
+        if removed:
             self.update()
+
+    def clear_notes(self):
+        """Release every lit key"""
+        self.active_notes[:] = bytes(128)
+        self.update()
+
+    def lit_notes(self):
+        """Set of MIDI notes currently lit"""
+        return {note for note, state in enumerate(self.active_notes) if state}
     
     def set_finger_assignment(self, note, finger):
         """Assign a finger (1-5) to a note"""
@@ -73,6 +131,11 @@ class PianoWidget(QWidget):
             self.finger_assignments[note] = finger
             self.update()
     
+    def set_finger_assignments(self, assignments):
+        """Replace all finger assignments from a {note: finger} dict with one repaint"""
+        self.finger_assignments = {note: finger for note, finger in assignments.items() if 1 <= finger <= 5}
+        self.update()
+    
     def clear_finger_assignments(self):
         """Clear all finger assignments"""
         self.finger_assignments = {}
@@ -84,10 +147,7 @@ class PianoWidget(QWidget):
     
     def get_note_name(self, note):
         """Get the name of a note (e.g., C4, D#5)"""
-        note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-        octave = (note // 12) - 1
-        name = note_names[note % 12]
-        return f"{name}{octave}"
+        return NOTE_NAMES[note]
     
     def paintEvent(self, event):
         painter = QPainter(self)
@@ -98,17 +158,28 @@ class PianoWidget(QWidget):
         height = rect.height()
         
         # Calculate white key width
-        # Count white keys
-        white_keys_count = 0
-        for i in range(self.num_keys):
-            note = self.start_note + i
-            if not self.is_black(note):
-                white_keys_count += 1
-        
+        white_keys_count = self.white_keys_count
         if white_keys_count == 0: return
 
         key_width = width / white_keys_count
         
+        # Loop-invariant pens, brushes and fonts (built once per paint, not per key)
+        white_brush = QBrush(QColor(252, 252, 252))  # Off-white (warmer than pure white)
+        white_border_pen = QPen(QColor(50, 50, 50), 1.5)
+        shadow_brush = QBrush(QColor(0, 0, 0, 12))
+        white_label_pen = QPen(Qt.GlobalColor.black)
+        white_finger_font = QFont("Arial", 14, QFont.Weight.Bold)
+        black_brush = QBrush(QColor(28, 28, 32))  # Darker charcoal (not pure black)
+        black_border_pen = QPen(QColor(15, 15, 15), 1.5)
+        highlight_brush = QBrush(QColor(255, 255, 255, 15))
+        black_label_pen = QPen(Qt.GlobalColor.white)
+        black_label_font = QFont("Arial", 8)
+        black_finger_pen = QPen(QColor(255, 255, 255))
+        black_finger_font = QFont("Arial", 10, QFont.Weight.Bold)
+        no_pen = Qt.PenStyle.NoPen
+        label_align = Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignHCenter
+        finger_align = Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignHCenter
+        
         # Draw White Keys
         x = 0
         self.white_key_rects = {} # note -> rect
@@ -120,8 +191,9 @@ class PianoWidget(QWidget):
                 self.white_key_rects[note] = r
                 
                 # Color with professional styling
-                if note in self.active_notes:
-                    brush = QBrush(self.active_notes[note])
+                state = self.active_notes[note]
+                if state:
+                    brush = self.source_brushes[state - 1]
                 elif note in self.finger_assignments and self.show_finger_colors:
                     # Use finger color with subtle transparency
                     finger = self.finger_assignments[note]
@@ -129,35 +201,31 @@ class PianoWidget(QWidget):
                     color.setAlpha(65)  # More subtle
                     brush = QBrush(color)
                 else:
-                    brush = QBrush(QColor(252, 252, 252))  # Off-white (warmer than pure white)
+                    brush = white_brush
                 
                 painter.setBrush(brush)
                 # Professional border: darker gray with slight shadow effect
-                painter.setPen(QPen(QColor(50, 50, 50), 1.5))
+                painter.setPen(white_border_pen)
                 painter.drawRect(r)
                 
                 # Add subtle inner shadow for depth
-                if note not in self.active_notes:
-                    shadow_color = QColor(0, 0, 0, 12)
-                    painter.setBrush(QBrush(shadow_color))
-                    painter.setPen(Qt.PenStyle.NoPen)
+                if not state:
+                    painter.setBrush(shadow_brush)
+                    painter.setPen(no_pen)
                     shadow_rect = QRectF(r.x() + 1, r.y() + 1, r.width() - 2, 4)
                     painter.drawRect(shadow_rect)
                 
                 # Draw note name
                 if self.show_note_names:
-                    painter.setPen(QPen(Qt.GlobalColor.black))
-                    painter.drawText(r, Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignHCenter, 
-                                   self.get_note_name(note))
+                    painter.setPen(white_label_pen)
+                    painter.drawText(r, label_align, self.get_note_name(note))
                 
                 # Draw finger number if assigned
                 if note in self.finger_assignments and self.show_finger_numbers:
                     finger = self.finger_assignments[note]
                     painter.setPen(QPen(self.get_finger_color(finger)))
-                    font = QFont("Arial", 14, QFont.Weight.Bold)
-                    painter.setFont(font)
-                    painter.drawText(r, Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignHCenter, 
-                                   str(finger))
+                    painter.setFont(white_finger_font)
+                    painter.drawText(r, finger_align, str(finger))
 
                 x += key_width
 
@@ -185,8 +253,9 @@ class PianoWidget(QWidget):
                 r = QRectF(bx, 0, black_key_width, black_key_height)
                 self.black_key_rects[note] = r
                 
-                if note in self.active_notes:
-                    brush = QBrush(self.active_notes[note])
+                state = self.active_notes[note]
+                if state:
+                    brush = self.source_brushes[state - 1]
                 elif note in self.finger_assignments and self.show_finger_colors:
                     # Use finger color with subtle transparency
                     finger = self.finger_assignments[note]
@@ -194,37 +263,32 @@ class PianoWidget(QWidget):
                     color.setAlpha(140)  # Slightly more visible on black keys
                     brush = QBrush(color)
                 else:
-                    brush = QBrush(QColor(28, 28, 32))  # Darker charcoal (not pure black)
+                    brush = black_brush
                 
                 painter.setBrush(brush)
                 # Subtle border for definition
-                painter.setPen(QPen(QColor(15, 15, 15), 1.5))
+                painter.setPen(black_border_pen)
                 painter.drawRect(r)
                 
                 # Add highlight on top edge for 3D effect
-                if note not in self.active_notes:
-                    highlight_color = QColor(255, 255, 255, 15)
-                    painter.setBrush(QBrush(highlight_color))
-                    painter.setPen(Qt.PenStyle.NoPen)
+                if not state:
+                    painter.setBrush(highlight_brush)
+                    painter.setPen(no_pen)
                     highlight_rect = QRectF(r.x() + 1, r.y() + 1, r.width() - 2, 3)
                     painter.drawRect(highlight_rect)
                 
                 # Draw note name on black keys
                 if self.show_note_names:
-                    painter.setPen(QPen(Qt.GlobalColor.white))
-                    font = QFont("Arial", 8)
-                    painter.setFont(font)
-                    painter.drawText(r, Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignHCenter, 
-                                   self.get_note_name(note))
+                    painter.setPen(black_label_pen)
+                    painter.setFont(black_label_font)
+                    painter.drawText(r, label_align, self.get_note_name(note))
                 
                 # Draw finger number on black keys
                 if note in self.finger_assignments and self.show_finger_numbers:
                     finger = self.finger_assignments[note]
-                    painter.setPen(QPen(QColor(255, 255, 255)))
-                    font = QFont("Arial", 10, QFont.Weight.Bold)
-                    painter.setFont(font)
-                    painter.drawText(r, Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignHCenter, 
-                                   str(finger))
+                    painter.setPen(black_finger_pen)
+                    painter.setFont(black_finger_font)
+                    painter.drawText(r, finger_align, str(finger))
             else:
                 current_white_x += key_width
 
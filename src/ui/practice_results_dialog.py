@@ -8,6 +8,7 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                               QFrame)
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont, QColor, QPalette
+from src.ui.piano_widget import NOTE_NAMES
 import time
 
 
@@ -480,10 +481,7 @@ class PracticeResultsDialog(QDialog):
     
     def _midi_to_note_name(self, midi_note):
         """Convert MIDI note number to name"""
-        note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-        octave = (midi_note // 12) - 1
-        note = note_names[midi_note % 12]
-        return f"{note}{octave}"
+        return NOTE_NAMES[midi_note]
     
     def _update_star_display(self):
         """Update star display based on rating"""
@@ -15,15 +15,28 @@ class ProgressBar(QWidget):
         self.setMouseTracking(True)
         self.hover_time = None
         
+        # Cached values derived from total_duration (recomputed only in set_duration)
+        self._inv_duration = 0.0
+        self._total_str = self._format_time(0.0)
+        self._drawn_state = None  # (progress pixel, displayed second) of the last repaint
+        
     def set_duration(self, duration):
         """Set total song duration"""
         self.total_duration = duration
+        self._inv_duration = 1.0 / duration if duration > 0 else 0.0
+        self._total_str = self._format_time(duration)
+        self._drawn_state = None
         self.update()
     
     def set_time(self, time):
         """Update current playback time"""
         self.current_time = time
-        self.update()
+        
+        # Only repaint when the filled bar or the MM:SS label would actually change
+        state = (int((self.width() - 20) * time * self._inv_duration), time // 1)
+        if state != self._drawn_state:
+            self._drawn_state = state
+            self.update()
     
     def mousePressEvent(self, event: QMouseEvent):
         """Handle click to seek"""
@@ -66,7 +79,7 @@ class ProgressBar(QWidget):
         
         if self.total_duration > 0:
             # Progress bar filled portion
-            progress_width = int((width - 20) * self.current_time / self.total_duration)
+            progress_width = int((width - 20) * self.current_time * self._inv_duration)
             painter.setBrush(QBrush(QColor(52, 152, 219)))  # Blue progress
             painter.drawRoundedRect(10, bar_y, progress_width, bar_height, 4.0, 4.0)
             
@@ -82,8 +95,7 @@ class ProgressBar(QWidget):
             
             # Current time text
             current_str = self._format_time(self.current_time)
-            total_str = self._format_time(self.total_duration)
-            time_text = f"{current_str} / {total_str}"
+            time_text = f"{current_str} / {self._total_str}"
             
             painter.setPen(QPen(QColor(236, 240, 241)))
             painter.drawText(15, height - 8, time_text)
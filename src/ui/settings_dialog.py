@@ -1,3 +1,4 @@
+from functools import partial
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, 
                              QDialogButtonBox, QSpinBox, QTabWidget, QWidget, QSlider,
                              QCheckBox, QGroupBox, QFormLayout, QPushButton, QColorDialog, 
@@ -310,7 +311,7 @@ class SettingsDialog(QDialog):
         refresh_conn_btn = QPushButton("🔄")
         refresh_conn_btn.setMaximumWidth(40)
         refresh_conn_btn.setToolTip("Refresh available ports")
-        refresh_conn_btn.clicked.connect(lambda: self._refresh_connection_ports(settings))
+        refresh_conn_btn.clicked.connect(partial(self._refresh_connection_ports, settings))
         port_layout_conn.addWidget(refresh_conn_btn)
         
         layout.addRow("Arduino Port:", port_layout_conn)
@@ -356,6 +357,12 @@ class SettingsDialog(QDialog):
         self.leds_per_key.setValue(settings.get("leds_per_key", 1) if settings else 1)
         led_layout.addRow("LEDs per key:", self.leds_per_key)
         
+        # LEDs the Arduino sketch drives (its NUM_LEDS); the calibration wizard can't light past it
+        self.led_strip_leds = QSpinBox()
+        self.led_strip_leds.setRange(1, 1000)
+        self.led_strip_leds.setValue(settings.get("led_strip_leds", 88) if settings else 88)
+        led_layout.addRow("Strip LEDs (NUM_LEDS):", self.led_strip_leds)
+        
         # LED brightness
         brightness_layout = QHBoxLayout()
         self.led_brightness = QSlider(Qt.Orientation.Horizontal)
@@ -395,7 +402,7 @@ class SettingsDialog(QDialog):
         refresh_led_btn = QPushButton("🔄")
         refresh_led_btn.setMaximumWidth(40)
         refresh_led_btn.setToolTip("Refresh available ports")
-        refresh_led_btn.clicked.connect(lambda: self._refresh_ledteacher_ports(settings))
+        refresh_led_btn.clicked.connect(partial(self._refresh_ledteacher_ports, settings))
         port_layout_led.addWidget(refresh_led_btn)
         
         comm_layout.addRow("Arduino Port:", port_layout_led)
@@ -522,7 +529,7 @@ class SettingsDialog(QDialog):
             self.played_note_color = color
             self.played_note_color_btn.setStyleSheet(f"background-color: rgb({color.red()}, {color.green()}, {color.blue()});")
     
-    def _refresh_connection_ports(self, settings=None):
+    def _refresh_connection_ports(self, settings=None, checked=False):
         """Refresh and populate Connection port selector with available ports"""
         import serial.tools.list_ports
         
@@ -566,7 +573,7 @@ class SettingsDialog(QDialog):
         display_text = self.port_input.currentText()
         return self.connection_port_map.get(display_text, display_text.split(" - ")[0] if " - " in display_text else display_text)
     
-    def _refresh_ledteacher_ports(self, settings=None):
+    def _refresh_ledteacher_ports(self, settings=None, checked=False):
         """Refresh and populate LedTeacher port selector with available ports"""
         import serial.tools.list_ports
         
@@ -663,7 +670,7 @@ class SettingsDialog(QDialog):
         arduino_conn = None  # TODO: Get from main window if connected
         
         # Create and show wizard
-        wizard = create_led_teacher_wizard(arduino_conn, self)
+        wizard = create_led_teacher_wizard(arduino_conn, self, self.led_strip_leds.value())
         
         # Connect signal to handle completion
         wizard.calibration_complete.connect(self._on_led_calibration_complete)
@@ -946,6 +953,7 @@ class SettingsDialog(QDialog):
             # LedTeacher
             "ledteacher_enabled": self.ledteacher_enabled.isChecked(),
             "leds_per_key": self.leds_per_key.value(),
+            "led_strip_leds": self.led_strip_leds.value(),
             "led_brightness": self.led_brightness.value(),
             "led_color_mode": self.led_color_mode.currentText(),
             "ledteacher_port": self._get_actual_ledteacher_port(),  # Save actual COM port, not display text
@@ -4,9 +4,29 @@ from PyQt6.QtGui import QPainter, QColor, QPen, QFont, QBrush, QFontDatabase
 from src.ui.note_widget import NoteWidget, SongWidget, NoteType
 from src.core.timing_sync import TimingSyncManager
 import mido
+import numpy as np
+import hashlib
+import json
+import heapq
+from operator import itemgetter
 import os
 import time
 
+# Bump when _parse_midi_timeline's output changes, so stale timeline caches are ignored
+TIMELINE_CACHE_VERSION = 1
+
+# MIDI note drawn on the reference line of each single-staff clef
+CLEF_REFERENCE_NOTES = {
+    "treble": 71,        # B4 (middle line)
+    "bass": 50,          # D3 (middle line)
+    "alto": 60,          # C4 (middle line) - Alto/Viola clef
+    "tenor": 57,         # A3 (middle line) - Tenor clef
+    "soprano": 60,       # C4 (1st line) - Soprano clef
+    "mezzosoprano": 57,  # A3 (2nd line) - Mezzosoprano clef
+    "baritone": 53,      # F3 (middle line) - Baritone clef
+}
+
+
 class StaffWidget(QWidget):
     """Interactive musical staff that displays and highlights notes during playback"""
     
@@ -35,6 +55,8 @@ class StaffWidget(QWidget):
         
         # Musical data
         self.notes = []  # List of {id, time, pitch, duration, x, y, chord_id}
+        self._build_note_arrays()  # Parallel NumPy columns of self.notes, indexed by note id
+        self._note_widgets_by_id = {}  # {note_id: NoteWidget} built alongside song_widget
         self.chords = []  # List of chord groups: {id, time, note_ids: [ids]}
         self.active_note_ids = set()  # IDs of notes currently being played
         self.played_note_color = QColor(30, 144, 255)  # Dodger blue (professional highlight)
@@ -83,6 +105,7 @@ class StaffWidget(QWidget):
             5: QColor(200, 100, 255)    # Purple - Pinky
         }
         self.note_fingers = {}  # {note_id: finger_number}
+        self.pitch_to_finger = {}  # {pitch: finger_number} first finger seen per pitch
         
         # Real-time playback logging
         self.playback_log_file = None
@@ -178,65 +201,20 @@ class StaffWidget(QWidget):
             traceback.print_exc()
             return False
     
-    def load_midi_notes(self, midi_path):
-        """Load notes from MIDI file"""
+    def load_midi_notes(self, midi_path, midi_file=None):
+        """Load notes from MIDI file (midi_file: already parsed mido.MidiFile of midi_path, if any)"""
         try:
-            # Export notes to TXT automatically
-            
-            mid = mido.MidiFile(midi_path)
             self.notes = []
+            self._build_note_arrays()
+            # Note ids of the previous song mean nothing now
+            self.triggered_notes.clear()
+            self.active_note_ids.clear()
             
-            # Convert ticks to seconds
-            tempo = 500000  # Default tempo (120 BPM)
-            ticks_per_beat = mid.ticks_per_beat
-            
-            # Extract metadata from MIDI
-            for track in mid.tracks:
-                # Try to extract title and composer from track name
-                if hasattr(track, 'name') and track.name:
-                    if not self.piece_title and track.name.strip():
-                        self.piece_title = track.name.strip()
-                
-                for msg in track:
-                    if msg.type == 'set_tempo':
-                        tempo = msg.tempo
-                        self.tempo_bpm = int(60000000 / tempo)  # Convert microseconds to BPM
-                        # Set tempo text based on BPM
-                        if self.tempo_bpm < 60:
-                            self.tempo_text = "Largo"
-                        elif self.tempo_bpm < 76:
-                            self.tempo_text = "Adagio"
-                        elif self.tempo_bpm < 108:
-                            self.tempo_text = "Andante"
-                        elif self.tempo_bpm < 120:
-                            self.tempo_text = "Moderato"
-                        elif self.tempo_bpm < 168:
-                            self.tempo_text = "Allegro"
-                        else:
-                            self.tempo_text = "Presto"
-                    elif msg.type == 'time_signature':
-                        self.time_signature = (msg.numerator, msg.denominator)
-                    elif msg.type == 'key_signature':
-                        # Key signature: number of sharps (positive) or flats (negative)
-                        if hasattr(msg, 'key'):
-                            # Convert to int if it's a string
-                            try:
-                                self.key_signature = int(msg.key) if isinstance(msg.key, str) else msg.key
-                            except (ValueError, TypeError):
-                                self.key_signature = 0
-                        else:
-                            self.key_signature = 0
-                    elif msg.type == 'text' or msg.type == 'copyright':
-                        # Try to find composer in copyright or text metadata
-                        if hasattr(msg, 'text') and msg.text and not self.composer:
-                            text = msg.text.strip()
-                            if any(word in text.lower() for word in ['composer', 'by', 'autor', 'music']):
-                                self.composer = text
-            
-            # If no title found, use filename
-            if not self.piece_title:
-                import os
-                self.piece_title = os.path.splitext(os.path.basename(midi_path))[0]
+            # Reuse the parsed timeline from library/cache when the MIDI file is unchanged
+            events = self._load_cached_timeline(midi_path)
+            if events is None:
+                events = self._parse_midi_timeline(midi_path, midi_file)
+                self._save_cached_timeline(midi_path, events)
             
             print(f"StaffWidget: '{self.piece_title}' by {self.composer if self.composer else 'Unknown'}")
             print(f"StaffWidget: Tempo = {self.tempo_bpm} BPM ({self.tempo_text}), Time signature = {self.time_signature[0]}/{self.time_signature[1]}")
@@ -250,83 +228,44 @@ class StaffWidget(QWidget):
             self.pixels_per_second = self.base_pixels_per_second * tempo_factor * self.visual_zoom_scale
             print(f"StaffWidget: Scroll speed adjusted to {self.pixels_per_second:.1f} px/s (tempo={self.tempo_bpm}, zoom={self.visual_zoom_scale*100:.0f}%)")
             
-            # Combine all tracks into single timeline
-            events = []
-            for track_idx, track in enumerate(mid.tracks):
-                current_tick = 0
-                current_tempo = tempo
-                
-                for msg in track:
-                    current_tick += msg.time
-                    
-                    # Update tempo if we see tempo change
-                    if msg.type == 'set_tempo':
-                        current_tempo = msg.tempo
-                    
-                    if msg.type in ['note_on', 'note_off']:
-                        # Convert ticks to seconds
-                        time_seconds = mido.tick2second(current_tick, ticks_per_beat, current_tempo)
-                        
-                        events.append({
-                            'time': time_seconds,
-                            'type': msg.type,
-                            'note': msg.note,
-                            'velocity': msg.velocity if hasattr(msg, 'velocity') else 0,
-                            'track': track_idx
-                        })
-            
-            # Sort all events by time
-            events.sort(key=lambda e: e['time'])
-            
             # Find the first note_on event to eliminate initial silence
-            first_note_time = None
-            for event in events:
-                if event['type'] == 'note_on' and event['velocity'] > 0:
-                    first_note_time = event['time']
-                    break
+            first_note_time = next((t for t, is_on, _ in events if is_on), None)
             
             # Offset all events so first note starts at time 0
             time_offset = first_note_time if first_note_time is not None else 0
             if time_offset > 0:
-                for event in events:
-                    event['time'] -= time_offset
                 print(f"StaffWidget: Removed {time_offset:.2f}s of initial silence")
             
             # Track active notes
             active_notes = {}  # pitch -> start_time
+            notes = self.notes
+            preparation_time = self.preparation_time
+            pixels_per_second = self.pixels_per_second
             
-            for event in events:
-                if event['type'] == 'note_on' and event['velocity'] > 0:
+            for event_time, is_on, pitch in events:
+                event_time -= time_offset
+                if is_on:
                     # Note starts
-                    if event['note'] not in active_notes:
-                        active_notes[event['note']] = event['time']
+                    if pitch not in active_notes:
+                        active_notes[pitch] = event_time
                 
-                elif event['type'] == 'note_off' or (event['type'] == 'note_on' and event['velocity'] == 0):
+                elif pitch in active_notes:
                     # Note ends
-                    if event['note'] in active_notes:
-                        start_time = active_notes[event['note']]
-                        duration = event['time'] - start_time
-                        
-                        # Calculate position with proportional spacing
-                        # Will be recalculated after all notes are loaded
-                        x = (start_time + self.preparation_time) * self.pixels_per_second
-                        y = self.pitch_to_y(event['note'])
-                        
-                        note_id = len(self.notes)  # Unique ID for this note
-                        
-                        # Determine accidental (sharp/flat/natural)
-                        accidental = self._get_accidental(event['note'])
-                        
-                        self.notes.append({
-                            'id': note_id,
-                            'time': start_time,
-                            'pitch': event['note'],
-                            'duration': duration,
-                            'x': x,
-                            'y': y,
-                            'accidental': accidental  # 'sharp', 'flat', 'natural', or None
-                        })
-                        del active_notes[event['note']]
+                    start_time = active_notes.pop(pitch)
+                    
+                    # Calculate position with proportional spacing
+                    # Will be recalculated after all notes are loaded
+                    notes.append({
+                        'id': len(notes),  # Unique ID for this note
+                        'time': start_time,
+                        'pitch': pitch,
+                        'duration': event_time - start_time,
+                        'x': (start_time + preparation_time) * pixels_per_second,
+                        'accidental': self._get_accidental(pitch)  # 'sharp', 'flat', 'natural', or None
+                    })
+            
+            self._build_note_arrays()
+            self.recalculate_note_positions()
             
             # Group notes into chords (notes that start at the same time)
             self.chords = []
@@ -386,6 +325,158 @@ class StaffWidget(QWidget):
             traceback.print_exc()
             return False
     
+    def _parse_midi_timeline(self, midi_path, midi_file=None):
+        """Read metadata and the merged (time, is_on, pitch) event timeline from a MIDI file"""
+        mid = midi_file if midi_file is not None else mido.MidiFile(midi_path)
+        
+        # Convert ticks to seconds
+        tempo = 500000  # Default tempo (120 BPM)
+        ticks_per_beat = mid.ticks_per_beat
+        
+        # Extract metadata from MIDI
+        for track in mid.tracks:
+            # Try to extract title and composer from track name
+            if hasattr(track, 'name') and track.name:
+                if not self.piece_title and track.name.strip():
+                    self.piece_title = track.name.strip()
+            
+            for msg in track:
+                if msg.type == 'set_tempo':
+                    tempo = msg.tempo
+                    self.tempo_bpm = int(60000000 / tempo)  # Convert microseconds to BPM
+                    # Set tempo text based on BPM
+                    if self.tempo_bpm < 60:
+                        self.tempo_text = "Largo"
+                    elif self.tempo_bpm < 76:
+                        self.tempo_text = "Adagio"
+                    elif self.tempo_bpm < 108:
+                        self.tempo_text = "Andante"
+                    elif self.tempo_bpm < 120:
+                        self.tempo_text = "Moderato"
+                    elif self.tempo_bpm < 168:
+                        self.tempo_text = "Allegro"
+                    else:
+                        self.tempo_text = "Presto"
+                elif msg.type == 'time_signature':
+                    self.time_signature = (msg.numerator, msg.denominator)
+                elif msg.type == 'key_signature':
+                    # Key signature: number of sharps (positive) or flats (negative)
+                    if hasattr(msg, 'key'):
+                        # Convert to int if it's a string
+                        try:
+                            self.key_signature = int(msg.key) if isinstance(msg.key, str) else msg.key
+                        except (ValueError, TypeError):
+                            self.key_signature = 0
+                    else:
+                        self.key_signature = 0
+                elif msg.type == 'text' or msg.type == 'copyright':
+                    # Try to find composer in copyright or text metadata
+                    if hasattr(msg, 'text') and msg.text and not self.composer:
+                        text = msg.text.strip()
+                        if any(word in text.lower() for word in ['composer', 'by', 'autor', 'music']):
+                            self.composer = text
+        
+        # If no title found, use filename
+        if not self.piece_title:
+            self.piece_title = os.path.splitext(os.path.basename(midi_path))[0]
+        
+        # Combine all tracks into single timeline
+        # Each track is already in time order, so merge them instead of sorting everything
+        # Events are plain (time, is_on, pitch) tuples - no per-event dicts in the hot loop
+        track_events = []
+        for track in mid.tracks:
+            current_tick = 0
+            # Seconds per tick, same formula as mido.tick2second, updated only on tempo change
+            scale = tempo * 1e-6 / ticks_per_beat
+            events = []
+            append = events.append
+
+            for msg in track:
+                current_tick += msg.time
+                msg_type = msg.type
+                
+                if msg_type == 'note_on':
+                    append((current_tick * scale, msg.velocity > 0, msg.note))
+                elif msg_type == 'note_off':
+                    append((current_tick * scale, False, msg.note))
+                elif msg_type == 'set_tempo':
+                    # Update tempo if we see tempo change
+                    scale = msg.tempo * 1e-6 / ticks_per_beat
+
+            # A mid-track tempo change can break ordering, only then sort this track
+            if any(events[i - 1][0] > events[i][0] for i in range(1, len(events))):
+                events.sort(key=itemgetter(0))
+            track_events.append(events)
+
+        # Merge per-track timelines (stable, same order as a full sort)
+        events = list(heapq.merge(*track_events, key=itemgetter(0)))
+        return events
+    
+    def _timeline_cache_path(self, midi_path):
+        """Sidecar file in library/cache holding the parsed timeline of a MIDI file"""
+        digest = hashlib.md5(os.path.abspath(midi_path).encode('utf-8')).hexdigest()
+        return os.path.join("library", "cache", f"{digest}.notes.json")
+    
+    def _load_cached_timeline(self, midi_path):
+        """Return cached events and restore metadata if the MIDI file and cache format are unchanged"""
+        cache_path = self._timeline_cache_path(midi_path)
+        try:
+            stat = os.stat(midi_path)
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if not isinstance(cached, dict):
+                return None
+            if cached.get('key') != [TIMELINE_CACHE_VERSION, stat.st_mtime, stat.st_size]:
+                return None
+            meta = cached['meta']
+            events = cached['events']
+            if not isinstance(events, list):
+                return None
+            # Read every field before touching self, so a partial cache changes nothing
+            piece_title = meta['piece_title']
+            composer = meta['composer']
+            tempo_bpm = meta['tempo_bpm']
+            tempo_text = meta['tempo_text']
+            time_signature = tuple(meta['time_signature'])
+            key_signature = meta['key_signature']
+        except (OSError, ValueError, KeyError, AttributeError, TypeError):
+            # Missing, corrupt or partial cache: fall back to parsing the MIDI file
+            return None
+        
+        self.piece_title = piece_title
+        self.composer = composer
+        self.tempo_bpm = tempo_bpm
+        self.tempo_text = tempo_text
+        self.time_signature = time_signature
+        self.key_signature = key_signature
+        print(f"StaffWidget: Using cached timeline {cache_path}")
+        return events
+    
+    def _save_cached_timeline(self, midi_path, events):
+        """Store the parsed timeline next to the other library caches"""
+        cache_path = self._timeline_cache_path(midi_path)
+        try:
+            stat = os.stat(midi_path)
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            # Write to a temp file first so a crash never leaves a half-written cache
+            tmp_path = cache_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'key': [TIMELINE_CACHE_VERSION, stat.st_mtime, stat.st_size],
+                    'meta': {
+                        'piece_title': self.piece_title,
+                        'composer': self.composer,
+                        'tempo_bpm': self.tempo_bpm,
+                        'tempo_text': self.tempo_text,
+                        'time_signature': list(self.time_signature),
+                        'key_signature': self.key_signature,
+                    },
+                    'events': events,
+                }, f, separators=(',', ':'))
+            os.replace(tmp_path, cache_path)
+        except (OSError, TypeError) as e:
+            print(f"StaffWidget: Could not cache timeline: {e}")
+    
     def pitch_to_y(self, midi_note):
         """Convert MIDI note number to Y position on staff"""
         if self.clef_type == "grand":
@@ -420,22 +511,7 @@ class StaffWidget(QWidget):
             staff_center_y = self.height() / 2
             
             # Different clefs have different reference notes on the middle line
-            if self.clef_type == "treble":
-                reference_note = 71  # B4 (middle line)
-            elif self.clef_type == "bass":
-                reference_note = 50  # D3 (middle line)
-            elif self.clef_type == "alto":
-                reference_note = 60  # C4 (middle line) - Alto/Viola clef
-            elif self.clef_type == "tenor":
-                reference_note = 57  # A3 (middle line) - Tenor clef
-            elif self.clef_type == "soprano":
-                reference_note = 60  # C4 (1st line) - Soprano clef
-            elif self.clef_type == "mezzosoprano":
-                reference_note = 57  # A3 (2nd line) - Mezzosoprano clef
-            elif self.clef_type == "baritone":
-                reference_note = 53  # F3 (middle line) - Baritone clef
-            else:
-                reference_note = 71  # Default to treble
+            reference_note = CLEF_REFERENCE_NOTES.get(self.clef_type, 71)  # Default to treble
             
             reference_y = staff_center_y
             
@@ -445,14 +521,50 @@ class StaffWidget(QWidget):
             
             return y
     
+    def pitches_to_y(self, pitches):
+        """Vectorized pitch_to_y for an integer array of MIDI notes"""
+        half_step = self.staff_spacing / 2
+        if self.clef_type == "grand":
+            staff_gap = 3 * self.staff_spacing
+            total_staff_height = 8 * self.staff_spacing + staff_gap
+            treble_center_y = (self.height() - total_staff_height) / 2 + 2 * self.staff_spacing
+            bass_center_y = treble_center_y + 4 * self.staff_spacing + staff_gap
+            # Same split as pitch_to_y: B3 (59) and up on the treble staff
+            treble = pitches >= 59
+            reference_note = np.where(treble, 71, 50)
+            reference_y = np.where(treble, treble_center_y, bass_center_y)
+        else:
+            reference_note = CLEF_REFERENCE_NOTES.get(self.clef_type, 71)
+            reference_y = self.height() / 2
+        return reference_y + (reference_note - pitches) * half_step
+    
+    def _build_note_arrays(self):
+        """Mirror self.notes into contiguous arrays (note id = index) for per-frame scans"""
+        notes = self.notes
+        count = len(notes)
+        self.note_pitches = np.fromiter((note['pitch'] for note in notes), dtype=np.intp, count=count)
+        self.note_starts = np.fromiter((note['time'] for note in notes), dtype=np.float64, count=count)
+        self.note_ends = self.note_starts + np.fromiter((note['duration'] for note in notes),
+                                                        dtype=np.float64, count=count)
+        self.note_ys = np.zeros(count)  # Staff y per note, filled by recalculate_note_positions
+        # Notes are stored in note-off order, so keep a start-sorted view for range searches
+        self._start_order = np.argsort(self.note_starts, kind='stable')
+        self._sorted_starts = self.note_starts[self._start_order]
+    
+    def recalculate_note_positions(self):
+        """Recompute every note's y for the current clef, spacing and height"""
+        if not self.notes:
+            return
+        # One array expression over the pitch column; readers index note_ys by note id
+        self.note_ys = self.pitches_to_y(self.note_pitches)
+    
     def resizeEvent(self, event):
         """Handle widget resize - recalculate note Y positions"""
         super().resizeEvent(event)
         
         # Recalculate Y positions for all notes since staff center changed
         if self.notes:
-            for note in self.notes:
-                note['y'] = self.pitch_to_y(note['pitch'])
+            self.recalculate_note_positions()
             self.update()
     
     def get_note_range(self):
@@ -469,8 +581,10 @@ class StaffWidget(QWidget):
         
         for note in self.notes:
             note['pitch'] += semitones
-            # Recalculate y position
-            note['y'] = self.pitch_to_y(note['pitch'])
+        self.note_pitches += semitones
+        self.pitch_to_finger = {pitch + semitones: finger for pitch, finger in self.pitch_to_finger.items()}
+        # Recalculate y positions
+        self.recalculate_note_positions()
         
         print(f"StaffWidget: Transposed all notes by {semitones} semitones")
     
@@ -559,6 +673,8 @@ class StaffWidget(QWidget):
     
     def _assign_fingers_to_notes(self):
         """Assign fingers to notes based on pitch and hand position"""
+        self.note_fingers = {}
+        self.pitch_to_finger = {}
         if not self.notes:
             return
         
@@ -582,6 +698,7 @@ class StaffWidget(QWidget):
                 finger = 5  # Pinky for high notes
             
             self.note_fingers[note_id] = finger
+            self.pitch_to_finger.setdefault(pitch, finger)
         
         print(f"StaffWidget: Assigned fingers to {len(self.note_fingers)} notes")
     
@@ -616,6 +733,7 @@ class StaffWidget(QWidget):
         Called after load_midi_notes() to populate song_widget.
         """
         self.song_widget.clear_notes()
+        self._note_widgets_by_id = {}
         
         for note_dict in self.notes:
             # Determine note type based on duration
@@ -654,6 +772,7 @@ class StaffWidget(QWidget):
             
             # Store original note_id for tracking
             note_widget._old_id = note_dict['id']
+            self._note_widgets_by_id[note_dict['id']] = note_widget
             
             self.song_widget.add_note(note_widget)
         
@@ -699,60 +818,68 @@ class StaffWidget(QWidget):
         # CRITICAL: Pre-trigger notes by audio latency amount
         # This ensures sound arrives at speakers EXACTLY when note crosses red line
         trigger_time = current_time + self.audio_latency_sec
+        # Notes ending before this are ignored (1 second buffer)
+        stale_time = current_time - 1.0
+        
+        # === NOTE OFF LOGIC ===
+        # Only notes already triggered can end, so scan that (small) set instead of the song.
+        # End note when duration expires (also pre-trigger by latency)
+        if self.triggered_notes:
+            for note_id in sorted(self.triggered_notes):
+                note_end_time = self.note_ends[note_id]
+                if stale_time <= note_end_time <= trigger_time:
+                    self._end_triggered_note(note_id, current_time)
+        
+        # === NOTE ON LOGIC ===
+        # Trigger when current time + latency reaches note time, i.e. note starts in
+        # [trigger_time - tolerance, trigger_time], but never more than tolerance ahead of now.
+        # Binary search on the start-sorted view yields just those candidates
+        lo = np.searchsorted(self._sorted_starts, trigger_time - trigger_tolerance, side='left')
+        hi = np.searchsorted(self._sorted_starts, min(trigger_time, current_time + trigger_tolerance), side='right')
+        if lo >= hi:
+            return
         
-        for note in self.notes:
-            note_id = note['id']
+        for note_id in np.sort(self._start_order[lo:hi]).tolist():
+            if note_id in self.triggered_notes or self.note_ends[note_id] < stale_time:
+                continue
+            
+            note = self.notes[note_id]
             note_time = note['time']
-            note_duration = note['duration']
-            note_end_time = note_time + note_duration
             
-            # Skip notes far in the past (beyond their end time + 1 second buffer)
-            if note_end_time < current_time - 1.0:
-                continue
+            # Mark as triggered
+            self.triggered_notes.add(note_id)
             
-            # Skip notes far in the future that haven't started yet
-            # BUT: Don't skip if note is already triggered (needs to check for end)
-            if note_time > current_time + trigger_tolerance and note_id not in self.triggered_notes:
-                continue
+            # Play sound (will reach speakers in ~12ms, perfectly synced with visual)
+            velocity = 80
+            self.note_triggered.emit(note['pitch'], velocity)
             
-            # === NOTE ON LOGIC ===
-            # Trigger when current time + latency reaches note time
-            # This pre-triggers the note so it sounds EXACTLY when crossing red line
-            if (note_time <= trigger_time <= note_time + trigger_tolerance and
-                note_id not in self.triggered_notes):
-                
-                # Mark as triggered
-                self.triggered_notes.add(note_id)
-                
-                # Play sound (will reach speakers in ~12ms, perfectly synced with visual)
-                velocity = 80
-                self.note_triggered.emit(note['pitch'], velocity)
-                
-                # Log to real-time playback file if enabled
-                if self.playback_logging_enabled and self.playback_log_file:
-                    try:
-                        self.playback_log_file.write(f"NOTE_ON | T={current_time:.4f}s | Pitch={note['pitch']} | Scheduled={note_time:.4f}s | PreTrigger={self.audio_latency_ms}ms | Diff={(trigger_time-note_time)*1000:.1f}ms\n")
-                        self.playback_log_file.flush()
-                    except:
-                        pass
-            
-            # === NOTE OFF LOGIC ===
-            # End note when duration expires (also pre-trigger by latency)
-            # Changed from elif to if to allow both ON and OFF in same iteration
-            if (trigger_time >= note_end_time and
-                note_id in self.triggered_notes):
-                
-                # Stop sound
-                self.triggered_notes.discard(note_id)
-                self.note_ended.emit(note['pitch'])
-                
-                # Log to real-time playback file if enabled
-                if self.playback_logging_enabled and self.playback_log_file:
-                    try:
-                        self.playback_log_file.write(f"NOTE_OFF | T={current_time:.4f}s | Pitch={note['pitch']} | Scheduled={note_end_time:.4f}s\n")
-                        self.playback_log_file.flush()
-                    except:
-                        pass
+            # Log to real-time playback file if enabled
+            if self.playback_logging_enabled and self.playback_log_file:
+                try:
+                    self.playback_log_file.write(f"NOTE_ON | T={current_time:.4f}s | Pitch={note['pitch']} | Scheduled={note_time:.4f}s | PreTrigger={self.audio_latency_ms}ms | Diff={(trigger_time-note_time)*1000:.1f}ms\n")
+                    self.playback_log_file.flush()
+                except:
+                    pass
+            
+            # Very short notes can start and end within the same frame
+            if trigger_time >= self.note_ends[note_id]:
+                self._end_triggered_note(note_id, current_time)
+    
+    def _end_triggered_note(self, note_id, current_time):
+        """Stop a triggered note and log it"""
+        note = self.notes[note_id]
+        
+        # Stop sound
+        self.triggered_notes.discard(note_id)
+        self.note_ended.emit(note['pitch'])
+        
+        # Log to real-time playback file if enabled
+        if self.playback_logging_enabled and self.playback_log_file:
+            try:
+                self.playback_log_file.write(f"NOTE_OFF | T={current_time:.4f}s | Pitch={note['pitch']} | Scheduled={self.note_ends[note_id]:.4f}s\n")
+                self.playback_log_file.flush()
+            except:
+                pass
     
     def start_playback_logging(self, output_path):
         """Start logging notes as they play in real-time"""
@@ -835,30 +962,29 @@ class StaffWidget(QWidget):
     
     def note_on(self, pitch):
         """Highlight specific note(s) with this pitch that are currently triggered"""
-        # Find and activate notes with this pitch that are in triggered_notes
-        for note in self.notes:
-            if note['pitch'] == pitch and note['id'] in self.triggered_notes:
-                self.active_note_ids.add(note['id'])
+        self.notes_on((pitch,))
+    
+    def notes_on(self, pitches):
+        """Highlight triggered notes for several pitches in one pass over the score"""
+        pitches = set(pitches)
+        # Find and activate notes with these pitches that are in triggered_notes
+        # (only a handful of notes are triggered at once, so scan those, not the song)
+        for note_id in self.triggered_notes:
+            if self.note_pitches[note_id] in pitches:
+                self.active_note_ids.add(note_id)
                 
                 # Also mark corresponding NoteWidget as played for color change
-                if hasattr(self, 'song_widget') and self.song_widget.notes:
-                    # Find the matching NoteWidget by time and pitch
-                    for note_widget in self.song_widget.notes:
-                        if (note_widget.pitch == pitch and 
-                            abs(note_widget.start_time - note['time']) < 0.001):
-                            note_widget.is_played = True
-                            break
+                note_widget = self._note_widgets_by_id.get(note_id)
+                if note_widget is not None:
+                    note_widget.is_played = True
         
         self.update()
     
     def note_off(self, pitch):
         """Remove highlight from specific note(s) with this pitch"""
         # Find and deactivate notes with this pitch that were recently activated
-        notes_to_deactivate = []
-        
-        for note in self.notes:
-            if note['pitch'] == pitch and note['id'] in self.active_note_ids:
-                notes_to_deactivate.append(note)
+        notes_to_deactivate = [self.notes[note_id] for note_id in sorted(self.active_note_ids)
+                               if self.note_pitches[note_id] == pitch]
         
         for note in notes_to_deactivate:
             note_id = note['id']
@@ -868,13 +994,9 @@ class StaffWidget(QWidget):
             self.active_note_ids.discard(note_id)
             
             # Also unmark corresponding NoteWidget as played to restore original color
-            if hasattr(self, 'song_widget') and self.song_widget.notes:
-                # Find the matching NoteWidget by time and pitch
-                for note_widget in self.song_widget.notes:
-                    if (note_widget.pitch == pitch and 
-                        abs(note_widget.start_time - note['time']) < 0.001):
-                        note_widget.is_played = False
-                        break
+            note_widget = self._note_widgets_by_id.get(note_id)
+            if note_widget is not None:
+                note_widget.is_played = False
             
             # If it was part of a chord, deactivate the whole chord
             if chord_id is not None and chord_id == self.active_chord_id:
@@ -886,6 +1008,16 @@ class StaffWidget(QWidget):
         
         self.update()
     
+    def clear_active_notes(self):
+        """Remove every note highlight with a single repaint"""
+        for note_id in self.active_note_ids:
+            note_widget = self._note_widgets_by_id.get(note_id)
+            if note_widget is not None:
+                note_widget.is_played = False
+        self.active_note_ids.clear()
+        self.active_chord_id = None
+        self.update()
+    
     def paintEvent(self, event):
 
         painter = QPainter(self)
@@ -1302,9 +1434,14 @@ class StaffWidget(QWidget):
         rendered_count = 0
         
         # Draw each note (OPTIMIZADO: solo revisar notas en rango visible)
-        for note_widget in self.song_widget.notes:
-            # EARLY CULLING: Saltar notas fuera del rango temporal visible
-            if note_widget.start_time < time_range_left or note_widget.start_time > time_range_right:
+        # EARLY CULLING: búsqueda binaria del rango temporal visible sobre los inicios ordenados
+        lo = np.searchsorted(self._sorted_starts, time_range_left, side='left')
+        hi = np.searchsorted(self._sorted_starts, time_range_right, side='right')
+        note_ys = self.note_ys
+        note_widgets = self._note_widgets_by_id
+        for note_id in self._start_order[lo:hi].tolist():
+            note_widget = note_widgets.get(note_id)
+            if note_widget is None:
                 continue
             
             # Calculate X position relative to current time
@@ -1312,8 +1449,8 @@ class StaffWidget(QWidget):
             time_offset = note_widget.start_time - self.current_time
             note_x = red_line_x + (time_offset * self.pixels_per_second)
             
-            # Calculate Y position (vertical, based on pitch)
-            note_y = self.pitch_to_y(note_widget.pitch)
+            # Y position (vertical, based on pitch), precomputed per note
+            note_y = note_ys[note_id]
             
             # Check if note is visible (spatial culling)
             if not note_widget.is_visible(note_x, viewport_left, viewport_right):
@@ -1369,7 +1506,7 @@ class StaffWidget(QWidget):
             stem_points = []
             for note in visible_notes:
                 note_x = note['x'] - self.scroll_offset
-                note_y = note['y']
+                note_y = self.note_ys[note['id']]
                 
                 if stem_down:
                     stem_x = note_x - note_width  # Align to left edge
@@ -1744,7 +1881,7 @@ class StaffWidget(QWidget):
             
             # Only draw notes visible on screen
             if note_x >= left_margin and note_x <= screen_width:
-                note_y = note['y']
+                note_y = self.note_ys[note['id']]
                 
                 # Draw ledger lines if note is outside staff
                 self.draw_ledger_lines_for_note(painter, note_x, note['pitch'])
@@ -1876,7 +2013,7 @@ class StaffWidget(QWidget):
                 if abs(note['time'] - self.current_time) < tolerance:
                     # This note should be right at the red line
                     note_visual_x = self.left_margin + note['x'] - self.scroll_offset
-                    note_y = note['y']
+                    note_y = self.note_ys[note['id']]
                     # Draw a small indicator
                     painter.setPen(QPen(QColor(0, 255, 0), 3))
                     painter.drawEllipse(int(note_visual_x - 3), int(note_y - 3), 6, 6)